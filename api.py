@@ -0,0 +1,127 @@
+"""철원 맛집 추천 JSON API (ASGI, 프레임워크 비의존)
+
+    uvicorn api:app --host 0.0.0.0 --port 8000 --workers 4
+
+    POST /recommend  {"eup": "갈말읍", "ri": "신철원리", "menu_type": "🍚 든든한 밥 (식사)",
+                      "group": "2~4인", "radius_km": 3, "dt": "2024-05-15T12:00", "top_k": 6}
+    GET  /health
+    GET  /metrics    (Prometheus 텍스트)
+
+추천 계산은 engine.recommend 를 작업 스레드에서 실행하고, 워커당 동시 계산 수는
+API_MAX_CONCURRENCY 로 제한한다 (같은 조건은 엔진의 결과 저장소/single-flight 로 재사용).
+"""
+import asyncio
+import json
+import os
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+import engine
+
+API_MAX_CONCURRENCY = int(os.getenv('API_MAX_CONCURRENCY', 8))
+API_MAX_BODY_BYTES = 64 * 1024
+PLACE_FIELDS = ['id', 'name', 'category', 'address', 'phone', 'distance', 'lat', 'lon', 'url',
+                'blog_count', 'rating', 'final_score', 'reasons']
+
+_semaphore = None  # 이벤트 루프 안에서 처음 요청이 올 때 생성
+
+
+def _json_default(value):
+    # 인덱스에서 온 numpy 값 등
+    if isinstance(value, np.generic):
+        return value.item()
+    return str(value)
+
+
+def to_response(record: Dict, top_k: int) -> Dict:
+    return {
+        'location': record['location'],
+        'candidates': record['scored_count'],
+        'candidates_exact': record['scored_count_exact'],  # False 면 최대값 (블로그 수 미조회 후보 포함)
+        'cached_at': record['cached_at'],
+        'places': record['top_picks'].records(PLACE_FIELDS)[:top_k],
+    }
+
+
+async def _read_body(receive) -> bytes:
+    chunks, size = [], 0
+    while True:
+        message = await receive()
+        chunk = message.get('body', b'')
+        size += len(chunk)
+        if size > API_MAX_BODY_BYTES:
+            raise ValueError("요청 본문이 너무 큽니다.")
+        chunks.append(chunk)
+        if not message.get('more_body'):
+            return b''.join(chunks)
+
+
+async def _send(send, status: int, body: bytes, content_type: str = 'application/json; charset=utf-8'):
+    headers: List[Tuple[bytes, bytes]] = [
+        (b'content-type', content_type.encode()), (b'content-length', str(len(body)).encode()),
+    ]
+    await send({'type': 'http.response.start', 'status': status, 'headers': headers})
+    await send({'type': 'http.response.body', 'body': body})
+
+
+async def _send_json(send, status: int, payload: Dict):
+    await _send(send, status, json.dumps(payload, ensure_ascii=False, default=_json_default).encode('utf-8'))
+
+
+async def recommend(receive, send):
+    global _semaphore
+    try:
+        query = json.loads(await _read_body(receive) or b'{}')
+        if not isinstance(query, dict):
+            raise ValueError("JSON 객체가 필요합니다.")
+        top_k = int(query.pop('top_k', engine.TOP_K))
+        if not 1 <= top_k <= engine.TOP_K:
+            raise ValueError(f"top_k 는 1~{engine.TOP_K} 사이여야 합니다.")
+    except (TypeError, ValueError) as e:  # JSONDecodeError 포함, top_k 가 숫자가 아니면 TypeError
+        await _send_json(send, 400, {'error': str(e)})
+        return
+
+    if _semaphore is None:
+        _semaphore = asyncio.Semaphore(API_MAX_CONCURRENCY)
+    try:
+        async with _semaphore:
+            with engine.start_trace('api.recommend'):
+                record = await asyncio.to_thread(engine.recommend, query)
+    except ValueError as e:
+        await _send_json(send, 400, {'error': str(e)})
+        return
+    await _send_json(send, 200, to_response(record, top_k))
+
+
+async def app(scope, receive, send):
+    if scope['type'] == 'lifespan':
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                if engine.WARM_INTERVAL:
+                    engine.start_warmer()
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+    if scope['type'] != 'http':
+        return
+
+    method, path = scope['method'], scope['path']
+    if path == '/recommend' and method == 'POST':
+        await recommend(receive, send)
+    elif path == '/health' and method == 'GET':
+        await _send_json(send, 200, {'status': 'ok'})
+    elif path == '/metrics' and method == 'GET':
+        await _send(send, 200, engine.render_prometheus().encode('utf-8'), 'text/plain; version=0.0.4; charset=utf-8')
+    elif path in ('/recommend', '/health', '/metrics'):
+        await _send_json(send, 405, {'error': 'method not allowed'})
+    else:
+        await _send_json(send, 404, {'error': 'not found'})
+
+
+if __name__ == '__main__':
+    import uvicorn
+    uvicorn.run('api:app', host=os.getenv('API_HOST', '0.0.0.0'), port=int(os.getenv('API_PORT', 8000)),
+                workers=int(os.getenv('API_WORKERS', 1)))
@@ -0,0 +1,182 @@
+"""읍/리 × 메뉴 × 인원 × 식사 시각 전체 추천 리포트 (배치 CLI)
+
+    python batch_report.py --date 2024-05-15 --out report.parquet
+    python batch_report.py --out report.csv --resume     # 중단된 곳부터 이어서
+    python batch_report.py --out report.csv --offline    # API 호출 없이 캐시/인덱스/예열 스냅샷만
+    python batch_report.py --out report.csv --mock       # 모의 API 서버 (bench/mock_api.py)
+
+읍/리마다 위치·식당·블로그 수를 한 번만 수집하고 (블로그 수는 모든 조건의 상위권 후보 합집합만),
+조건별 채점은 CPU 코어 수만큼의 프로세스에서 나눠 실행한다.
+읍/리별 결과는 <out>.parts/ 에 바로 저장되므로 중단돼도 --resume 으로 남은 곳만 이어서 계산하고,
+끝나면 하나의 Parquet/CSV 파일로 합친다.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import shutil
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from datetime import date, datetime
+from typing import Dict
+
+import pandas as pd
+
+REPORT_MEAL_HOURS = (8, 12, 18)
+REPORT_FIELDS = ['name', 'category', 'address', 'phone', 'distance', 'blog_count', 'rating',
+                 'final_score', 'reasons', 'url']
+
+
+def parse_args(argv=None):
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    p.add_argument('--out', default='report.parquet', help='결과 파일 (.parquet 또는 .csv)')
+    p.add_argument('--date', type=date.fromisoformat, default=date.today(), help='기준 날짜 (YYYY-MM-DD, 요일/날씨에 반영)')
+    p.add_argument('--hours', default=','.join(map(str, REPORT_MEAL_HOURS)), help='식사 시각 목록 (쉼표 구분)')
+    p.add_argument('--radius-km', type=float, default=3.0)
+    p.add_argument('--top-k', type=int, default=None, help='조건별 추천 수 (기본: engine.TOP_K)')
+    p.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='채점 프로세스 수')
+    p.add_argument('--resume', action='store_true', help='<out>.parts/ 의 완료된 읍/리는 건너뜀')
+    p.add_argument('--offline', action='store_true', help='외부 API 호출 없이 캐시/인덱스만 사용 (만료된 것 포함)')
+    p.add_argument('--mock', action='store_true', help='로컬 모의 API 서버로 실행')
+    p.add_argument('--mock-places', type=int, default=1500, help='모의 서버 식당 수')
+    p.add_argument('--seed', type=int, default=None, help='평점(가상) 난수 시드 (읍/리별로 고정)')
+    return p.parse_args(argv)
+
+
+def _score_location(job: Dict) -> pd.DataFrame:
+    """(작업 프로세스) 한 읍/리의 후보 테이블로 모든 조건을 채점 → 리포트 행"""
+    import engine
+    table = engine.CandidateTable(job['df'])
+    rows = []
+    for ctx in job['contexts']:
+        _, top_picks = engine.rank_places(table, ctx, job['top_k'])
+        candidates, exact = engine.count_candidates(table)  # 화면/API 의 'N개 후보' 와 같은 기준
+        for rank, p in enumerate(top_picks.records(REPORT_FIELDS), 1):
+            rows.append({
+                **job['location'], 'menu_type': ctx['menu_type'], 'group': ctx['group'],
+                'hour': ctx['dt'].hour, 'candidates': candidates,
+                'candidates_exact': exact, 'rank': rank,
+                **p, 'reasons': ", ".join(p['reasons']),
+            })
+    return pd.DataFrame(rows)
+
+
+def _part_path(parts_dir: str, n: int, eup: str, ri: str) -> str:
+    return os.path.join(parts_dir, f"{n:03d}_{eup}_{ri}.pkl")
+
+
+def _write_part(path: str, df: pd.DataFrame):
+    tmp = f"{path}.tmp"
+    df.to_pickle(tmp)
+    os.replace(tmp, path)
+
+
+def _prepare_parts_dir(parts_dir: str, config: Dict, resume: bool):
+    manifest = os.path.join(parts_dir, 'manifest.json')
+    if resume and os.path.exists(manifest):
+        with open(manifest, encoding='utf-8') as f:
+            if json.load(f) != config:
+                sys.exit(f"❌ {parts_dir} 는 다른 조건으로 만든 중간 결과입니다. --resume 없이 다시 실행하세요.")
+        return
+    shutil.rmtree(parts_dir, ignore_errors=True)
+    os.makedirs(parts_dir)
+    with open(manifest, 'w', encoding='utf-8') as f:
+        json.dump(config, f, ensure_ascii=False)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    # 엔진 모듈은 환경 변수를 import 시점에 읽으므로 먼저 설정
+    server = None
+    if args.mock:
+        sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'bench'))
+        from mock_api import MockAPIServer, generate_places
+        server = MockAPIServer(places=generate_places(args.mock_places, args.seed or 7), latency_ms=0, jitter_ms=0).start()
+        os.environ.update({
+            'KAKAO_API_BASE': server.base_url, 'NAVER_API_BASE': server.base_url,
+            'KAKAO_REST_API_KEY': 'report', 'NAVER_SERVICE_CLIENT_ID': 'report', 'NAVER_SERVICE_CLIENT_SECRET': 'report',
+            'RESTAURANT_INDEX_PATH': os.devnull,
+            # 모의 서버에는 호출 한도가 없으므로 키별 속도 제한도 풀어 둠
+            'KAKAO_RATE_PER_SEC': '1000', 'KAKAO_RATE_BURST': '1000',
+            'NAVER_RATE_PER_SEC': '1000', 'NAVER_RATE_BURST': '1000',
+        })
+    if args.offline:
+        os.environ['HTTP_OFFLINE'] = '1'
+    import engine
+
+    hours = [int(h) for h in args.hours.split(',')]
+    top_k = args.top_k or engine.TOP_K
+    radius_m = int(args.radius_km * 1000)
+    villages = [(eup, ri) for eup, ris in engine.CHEORWON_DATA.items() for ri in ris]
+    contexts = []
+    for hour in hours:
+        dt = datetime(args.date.year, args.date.month, args.date.day, hour)
+        weather = engine.estimate_weather(dt)
+        contexts += [{'menu_type': menu_type, 'group': group, 'dt': dt, 'weather': weather, 'age': None, 'gender': None}
+                     for menu_type in engine.MENU_TYPES for group in engine.GROUPS]
+
+    parts_dir = f"{args.out}.parts"
+    # 데이터원(모의/오프라인)과 평점 시드가 다르면 이어 붙인 결과가 섞이므로 함께 기록
+    config = {'date': args.date.isoformat(), 'hours': hours, 'radius_km': args.radius_km, 'top_k': top_k,
+              'menu_types': engine.MENU_TYPES, 'groups': engine.GROUPS,
+              'seed': args.seed, 'offline': args.offline, 'mock': args.mock,
+              'mock_places': args.mock_places if args.mock else None}
+    _prepare_parts_dir(parts_dir, config, args.resume)
+    todo = [(n, eup, ri) for n, (eup, ri) in enumerate(villages)
+            if not os.path.exists(_part_path(parts_dir, n, eup, ri))]
+    print(f"📋 {len(villages)}개 읍/리 × {len(contexts)}개 조건 (남은 읍/리 {len(todo)}곳)")
+
+    # 예열 스냅샷이 있으면 응답 캐시를 먼저 채움 (오프라인 실행 시 주 데이터원)
+    if not args.mock:
+        engine.Warmer().load_snapshot()
+
+    started = time.perf_counter()
+    kakao = engine.KakaoAPI()
+    # 수집 스레드(HTTP 세션/캐시)가 있는 프로세스를 fork 하지 않도록 spawn
+    with ProcessPoolExecutor(max_workers=args.workers, mp_context=multiprocessing.get_context('spawn')) as pool:
+        pending = {}
+
+        def drain(block: bool):
+            done = wait(pending, return_when=FIRST_COMPLETED).done if block else [f for f in pending if f.done()]
+            for fut in done:
+                _write_part(pending.pop(fut), fut.result())
+
+        for n, eup, ri in todo:
+            # 수집은 이 프로세스에서 (읍/리당 한 번), 채점은 작업 프로세스에서
+            location = engine.resolve_location(kakao, engine.build_full_addr(eup, ri), f"{eup} 중심")
+            table = engine.find_restaurants(kakao, location['lat'], location['lon'], radius_m)
+            if args.seed is not None:
+                random.seed(f"{args.seed}:{eup}:{ri}")  # 이어서 실행해도 같은 평점
+            table.df['rating'] = [engine.get_naver_rating(name) for name in table.df['name']]
+            fetched = engine.enrich_for_contexts(table, contexts, top_k) if len(table) else 0
+            print(f"  [{n + 1}/{len(villages)}] {eup} {ri}: 후보 {len(table)}곳, 블로그 수 조회 {fetched}곳"
+                  + (" (읍/면 중심으로 대체)" if location['fallback'] else ""))
+
+            job = {
+                'df': table.df, 'contexts': contexts, 'top_k': top_k,
+                'location': {'date': args.date.isoformat(), 'eup': eup, 'ri': ri,
+                             'reg_name': location['reg_name'], 'fallback': location['fallback']},
+            }
+            pending[pool.submit(_score_location, job)] = _part_path(parts_dir, n, eup, ri)
+            drain(block=len(pending) >= args.workers * 2)
+        while pending:
+            drain(block=True)
+
+    parts = sorted(f for f in os.listdir(parts_dir) if f.endswith('.pkl'))
+    report = pd.concat([pd.read_pickle(os.path.join(parts_dir, f)) for f in parts], ignore_index=True)
+    if args.out.endswith('.csv'):
+        report.to_csv(args.out, index=False, encoding='utf-8-sig')
+    else:
+        report.to_parquet(args.out, index=False)
+    shutil.rmtree(parts_dir)
+    if server is not None:
+        server.stop()
+
+    print(f"✅ {args.out}: {len(report)}행 ({len(parts)}개 읍/리) · {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == '__main__':
+    main()
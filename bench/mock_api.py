@@ -0,0 +1,211 @@
+"""카카오 로컬 / 네이버 블로그 검색 API 로컬 모의 서버 (벤치마크·오프라인 테스트용)
+
+    server = MockAPIServer(latency_ms=80, error_rate=0.02).start()
+    os.environ['KAKAO_API_BASE'] = os.environ['NAVER_API_BASE'] = server.base_url
+"""
+import hashlib
+import json
+import math
+import random
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+# 철원군 대략적 범위
+CHEORWON_BBOX = (38.10, 127.15, 38.35, 127.55)  # (min_lat, min_lon, max_lat, max_lon)
+
+CATEGORIES = [
+    "음식점 > 한식 > 국밥", "음식점 > 한식 > 해장국", "음식점 > 한식 > 육류,고기 > 삼겹살",
+    "음식점 > 한식 > 찌개,전골", "음식점 > 한식 > 냉면", "음식점 > 한식 > 칼국수",
+    "음식점 > 한식 > 한정식", "음식점 > 분식", "음식점 > 분식 > 김밥", "음식점 > 중식 > 중화요리",
+    "음식점 > 일식 > 회", "음식점 > 치킨", "음식점 > 패스트푸드", "음식점 > 양식 > 피자",
+    "음식점 > 카페", "음식점 > 간식 > 제과,베이커리", "음식점 > 술집 > 호프,요리주점",
+]
+
+PAGE_SIZE_MAX = 15
+PAGEABLE_MAX = 45
+
+
+def _stable_int(text: str) -> int:
+    return int(hashlib.md5(text.encode('utf-8')).hexdigest()[:8], 16)
+
+
+def _distance_m(lat1, lon1, lat2, lon2) -> float:
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * 6371000.0 * math.asin(math.sqrt(a))
+
+
+def generate_places(n: int = 1500, seed: int = 42) -> List[Dict]:
+    """철원군 범위에 무작위(고정 시드) 식당 문서 생성 - 카카오 카테고리 검색 문서 형식"""
+    rng = random.Random(seed)
+    min_lat, min_lon, max_lat, max_lon = CHEORWON_BBOX
+    places = []
+    for i in range(n):
+        lat, lon = rng.uniform(min_lat, max_lat), rng.uniform(min_lon, max_lon)
+        places.append({
+            'id': str(10000000 + i),
+            'place_name': f"철원식당{i}",
+            'category_name': rng.choice(CATEGORIES),
+            'category_group_code': 'FD6',
+            'road_address_name': f"강원특별자치도 철원군 모의로 {i}",
+            'address_name': f"강원특별자치도 철원군 모의리 {i}",
+            'phone': f"033-{rng.randint(400, 499)}-{rng.randint(1000, 9999)}",
+            'place_url': f"http://place.map.kakao.com/{10000000 + i}",
+            'x': f"{lon:.7f}",
+            'y': f"{lat:.7f}",
+        })
+    return places
+
+
+def geocode(query: str) -> Dict:
+    """같은 주소는 항상 같은 좌표 (철원군 범위 안)"""
+    h = _stable_int(query)
+    min_lat, min_lon, max_lat, max_lon = CHEORWON_BBOX
+    lat = min_lat + (h % 10000) / 10000 * (max_lat - min_lat)
+    lon = min_lon + (h // 10000 % 10000) / 10000 * (max_lon - min_lon)
+    return {'y': f"{lat:.7f}", 'x': f"{lon:.7f}", 'place_name': query, 'address_name': query}
+
+
+class MockAPIServer:
+    def __init__(self, places: Optional[List[Dict]] = None, latency_ms: float = 50.0, jitter_ms: float = 20.0,
+                 error_rate: float = 0.0, rate_limit_rate: float = 0.0, host: str = '127.0.0.1', port: int = 0,
+                 seed: int = 0):
+        self.places = places if places is not None else generate_places()
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.requests: Counter = Counter()
+        self.errors: Counter = Counter()
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer((host, port), self._make_handler())
+        self._httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @classmethod
+    def from_fixture(cls, path: str, **kwargs) -> 'MockAPIServer':
+        with open(path, encoding='utf-8') as f:
+            return cls(places=json.load(f)['places'], **kwargs)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> 'MockAPIServer':
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name='mock-api', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def reset_counters(self):
+        with self._lock:
+            self.requests.clear()
+            self.errors.clear()
+
+    # ------------------------------------------------------------------
+    def _inject_fault(self, endpoint: str) -> Optional[int]:
+        with self._lock:
+            self.requests[endpoint] += 1
+            delay = max(0.0, self.latency_ms + self._rng.uniform(-self.jitter_ms, self.jitter_ms)) / 1000
+            roll = self._rng.random()
+        time.sleep(delay)
+        if roll < self.rate_limit_rate:
+            status = 429
+        elif roll < self.rate_limit_rate + self.error_rate:
+            status = 500
+        else:
+            return None
+        with self._lock:
+            self.errors[endpoint] += 1
+        return status
+
+    def _category(self, q: Dict[str, str]) -> Dict:
+        x, y = float(q.get('x', 0)), float(q.get('y', 0))
+        radius = min(int(q.get('radius', 20000)), 20000)
+        size = min(int(q.get('size', PAGE_SIZE_MAX)), PAGE_SIZE_MAX)
+        page = int(q.get('page', 1))
+
+        docs = []
+        rect = [float(v) for v in q['rect'].split(',')] if q.get('rect') else None
+        for p in self.places:
+            plat, plon = float(p['y']), float(p['x'])
+            dist = _distance_m(y, x, plat, plon) if 'x' in q else 0.0
+            if rect:
+                if not (rect[0] <= plon <= rect[2] and rect[1] <= plat <= rect[3]):
+                    continue
+            elif dist > radius:
+                continue
+            docs.append({**p, 'distance': str(int(dist)) if 'x' in q else ''})
+        if q.get('sort', 'accuracy') == 'distance':
+            docs.sort(key=lambda d: int(d['distance'] or 0))
+
+        pageable = min(len(docs), PAGEABLE_MAX)
+        start = (page - 1) * size
+        page_docs = docs[start:min(start + size, pageable)]
+        return {
+            'meta': {'total_count': len(docs), 'pageable_count': pageable, 'is_end': start + size >= pageable},
+            'documents': page_docs,
+        }
+
+    def _blog(self, q: Dict[str, str]) -> Dict:
+        query = q.get('query', '')
+        display = int(q.get('display', 10))
+        total = _stable_int(query) % 400
+        items = [{
+            'title': f"<b>{query}</b> 후기 {i + 1}",
+            'link': f"https://blog.example.com/{_stable_int(query)}/{i}",
+            'description': f"{query} 다녀왔어요 &amp; 맛있어요",
+            'bloggername': 'mock', 'postdate': '20240101',
+        } for i in range(min(display, total))]
+        return {'total': total, 'start': 1, 'display': len(items), 'items': items}
+
+    def _route(self, path: str, q: Dict[str, str]) -> Optional[Dict]:
+        if path == '/v2/local/search/keyword.json' or path == '/v2/local/search/address.json':
+            if q.get('query') in ('', None):
+                return {'meta': {'total_count': 0}, 'documents': []}
+            return {'meta': {'total_count': 1}, 'documents': [geocode(q['query'])]}
+        if path == '/v2/local/geo/coord2regioncode.json':
+            return {'meta': {'total_count': 1}, 'documents': [
+                {'region_type': 'B', 'address_name': '강원특별자치도 철원군 갈말읍', 'x': q.get('x'), 'y': q.get('y')}
+            ]}
+        if path == '/v2/local/search/category.json':
+            return self._category(q)
+        if path in ('/v1/search/blog', '/v1/search/blog.json'):
+            return self._blog(q)
+        return None
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                q = {k: v[0] for k, v in parse_qs(url.query).items()}
+                endpoint = url.path
+                status = server._inject_fault(endpoint)
+                body = None if status else server._route(url.path, q)
+                if status is None and body is None:
+                    status = 404
+                payload = json.dumps(body if body is not None else {'errorType': 'mock', 'message': str(status)},
+                                     ensure_ascii=False).encode('utf-8')
+                self.send_response(status or 200)
+                self.send_header('Content-Type', 'application/json; charset=utf-8')
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
@@ -0,0 +1,153 @@
+"""검색 파이프라인 오프라인 벤치마크 (실제 API 키 불필요)
+
+    python bench/run_benchmark.py --users 20 --searches 5 --latency-ms 80 --error-rate 0.02
+    python bench/run_benchmark.py --cold --json bench_output.json
+
+로컬 모의 서버(bench/mock_api.py)를 띄우고, N명의 가상 사용자가 동시에
+search_stages() 파이프라인을 끝까지 실행한 뒤 p50/p95 지연, 처리량, 엔드포인트별 요청 수를 출력한다.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from mock_api import MockAPIServer  # noqa: E402
+
+RADII_KM = [1.0, 3.0, 5.0]
+
+
+def percentile(values, q: float) -> float:
+    if not values: return 0.0
+    ordered = sorted(values)
+    k = (len(ordered) - 1) * q
+    lo, hi = int(k), min(int(k) + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (k - lo)
+
+
+def parse_args(argv=None):
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    p.add_argument('--users', type=int, default=10, help='동시 가상 사용자 수')
+    p.add_argument('--searches', type=int, default=5, help='사용자당 검색 횟수')
+    p.add_argument('--latency-ms', type=float, default=80.0, help='모의 API 평균 지연')
+    p.add_argument('--jitter-ms', type=float, default=20.0, help='모의 API 지연 편차')
+    p.add_argument('--error-rate', type=float, default=0.0, help='5xx 응답 비율')
+    p.add_argument('--rate-limit-rate', type=float, default=0.0, help='429 응답 비율')
+    p.add_argument('--places', type=int, default=1500, help='생성할 모의 식당 수 (--fixtures 미지정 시)')
+    p.add_argument('--fixtures', help='카카오 문서 형식 식당 목록 JSON ({"places": [...]})')
+    p.add_argument('--cold', action='store_true', help='검색마다 응답 캐시를 비움')
+    p.add_argument('--api-rate', type=int, default=1000,
+                   help='엔진의 키별 초당 호출 한도 (기본 1000: 사실상 해제, 실제 한도 재현 시 예: 10)')
+    p.add_argument('--seed', type=int, default=7)
+    p.add_argument('--json', dest='json_out', help='결과를 JSON 파일로 저장')
+    return p.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    from mock_api import generate_places
+    server_kwargs = dict(latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+                         error_rate=args.error_rate, rate_limit_rate=args.rate_limit_rate, seed=args.seed)
+    if args.fixtures:
+        server = MockAPIServer.from_fixture(args.fixtures, **server_kwargs)
+    else:
+        server = MockAPIServer(places=generate_places(args.places, args.seed), **server_kwargs)
+    server.start()
+
+    # 엔진 모듈은 환경 변수를 import 시점에 읽으므로 먼저 설정
+    os.environ.update({
+        'KAKAO_API_BASE': server.base_url, 'NAVER_API_BASE': server.base_url,
+        'KAKAO_REST_API_KEY': 'bench', 'NAVER_SERVICE_CLIENT_ID': 'bench', 'NAVER_SERVICE_CLIENT_SECRET': 'bench',
+        'RESTAURANT_INDEX_PATH': os.devnull,
+        # 모의 서버에는 호출 한도가 없으므로 키별 속도 제한도 풀어 둠 (파이프라인 지연만 측정)
+        'KAKAO_RATE_PER_SEC': str(args.api_rate), 'KAKAO_RATE_BURST': str(args.api_rate),
+        'NAVER_RATE_PER_SEC': str(args.api_rate), 'NAVER_RATE_BURST': str(args.api_rate),
+    })
+    import engine
+
+    rng = random.Random(args.seed)
+    villages = [(eup, ri) for eup, ris in engine.CHEORWON_DATA.items() for ri in ris]
+    base_dt = datetime(2024, 5, 15, 12, 0)
+    jobs = [[{
+        'eup_ri': rng.choice(villages),
+        'radius': rng.choice(RADII_KM),
+        'ctx': {
+            'menu_type': rng.choice(engine.MENU_TYPES), 'group': rng.choice(engine.GROUPS),
+            'dt': base_dt + timedelta(hours=rng.randint(0, 10)),
+            'weather': {'desc': rng.choice(["쾌적 🍃", "비/흐림 🌧️"]), 'temp': 20},
+            'age': 30, 'gender': '남성',
+        },
+    } for _ in range(args.searches)] for _ in range(args.users)]
+
+    latencies, first_paint, failures = [], [], []
+    lock = threading.Lock()
+
+    def run_user(searches):
+        kakao = engine.KakaoAPI()
+        for job in searches:
+            if args.cold:
+                engine.get_response_cache().backend.clear()
+            eup, ri = job['eup_ri']
+            started = time.perf_counter()
+            provisional_at = None
+            try:
+                for stage, _ in engine.search_stages(kakao, engine.build_full_addr(eup, ri), f"{eup} 중심",
+                                                  int(job['radius'] * 1000), job['ctx']):
+                    if stage in ('provisional', 'empty') and provisional_at is None:
+                        provisional_at = time.perf_counter() - started
+            except Exception as e:  # 벤치마크는 실패도 집계하고 계속 진행
+                with lock: failures.append(repr(e))
+                continue
+            elapsed = time.perf_counter() - started
+            with lock:
+                latencies.append(elapsed)
+                first_paint.append(provisional_at if provisional_at is not None else elapsed)
+
+    wall_started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.users) as ex:
+        list(ex.map(run_user, jobs))
+    wall = time.perf_counter() - wall_started
+    server.stop()
+
+    report = {
+        'users': args.users, 'searches_per_user': args.searches, 'cold': args.cold,
+        'mock': {'latency_ms': args.latency_ms, 'jitter_ms': args.jitter_ms,
+                 'error_rate': args.error_rate, 'rate_limit_rate': args.rate_limit_rate,
+                 'api_rate': args.api_rate},
+        'completed': len(latencies), 'failed': len(failures),
+        'wall_seconds': round(wall, 3),
+        'throughput_per_s': round(len(latencies) / wall, 3) if wall else 0.0,
+        'latency_s': {'p50': round(percentile(latencies, 0.5), 4), 'p95': round(percentile(latencies, 0.95), 4),
+                      'max': round(max(latencies, default=0.0), 4)},
+        'first_paint_s': {'p50': round(percentile(first_paint, 0.5), 4), 'p95': round(percentile(first_paint, 0.95), 4)},
+        'requests': dict(server.requests), 'requests_total': sum(server.requests.values()),
+        'injected_errors': dict(server.errors),
+        'cache': engine.get_response_cache().stats(),
+    }
+
+    print(f"🏁 {report['completed']}건 완료 / 실패 {report['failed']}건 · 사용자 {args.users}명 · {wall:.2f}s")
+    print(f"   지연      p50 {report['latency_s']['p50']:.3f}s  p95 {report['latency_s']['p95']:.3f}s  max {report['latency_s']['max']:.3f}s")
+    print(f"   첫 화면   p50 {report['first_paint_s']['p50']:.3f}s  p95 {report['first_paint_s']['p95']:.3f}s")
+    print(f"   처리량    {report['throughput_per_s']:.2f} 검색/s")
+    print(f"   API 요청  총 {report['requests_total']}회 (검색당 {report['requests_total'] / max(len(latencies), 1):.1f}회)")
+    for endpoint, cnt in sorted(server.requests.items()):
+        print(f"     {endpoint:<40} {cnt}")
+    if failures:
+        print(f"   실패 예시: {failures[0]}")
+
+    if args.json_out:
+        with open(args.json_out, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    return report
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,1785 @@
+"""철원 맛집 추천 엔진 (Streamlit 비의존)
+
+카카오/네이버 API 클라이언트, 캐시, 추천 점수, 검색 파이프라인을 담은 모듈.
+Streamlit 앱(app_final.py), JSON API(api.py), 배치 리포트(batch_report.py), 벤치마크(bench/)가 공통으로 사용한다.
+
+    from engine import recommend
+    result = recommend({'eup': '갈말읍', 'ri': '신철원리', 'menu_type': '🍚 든든한 밥 (식사)'})
+
+    python engine.py --build-index   # 오프라인 식당 인덱스 생성
+    python engine.py --warm          # 인기 검색 예열 1회 + 스냅샷 저장
+"""
+import requests
+import pandas as pd
+import numpy as np
+from datetime import datetime, timedelta, timezone
+import json
+import functools
+import hashlib
+from requests.adapters import HTTPAdapter
+from typing import Any, Callable, Dict, Iterator, List, Tuple, Optional
+from collections import OrderedDict
+import random
+import re
+import time
+import os
+import sys
+import uuid
+import logging
+import contextvars
+from contextvars import ContextVar
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pickle
+import sqlite3
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+
+# ============================================================================
+# 🔐 환경 변수 로드
+# ============================================================================
+try:
+    from dotenv import load_dotenv
+    load_dotenv()
+except ImportError:
+    pass
+
+API_KEYS = {
+    'KAKAO_REST_API_KEY': os.getenv('KAKAO_REST_API_KEY'),
+    'NAVER_SERVICE_CLIENT_ID': os.getenv('NAVER_SERVICE_CLIENT_ID'),
+    'NAVER_SERVICE_CLIENT_SECRET': os.getenv('NAVER_SERVICE_CLIENT_SECRET')
+}
+
+# ============================================================================
+# 📍 데이터 및 설정
+# ============================================================================
+CHEORWON_DATA = {
+    "갈말읍": ["지포리", "신철원리", "토성리", "문혜리", "명지리", "상사리"],
+    "동송읍": ["이평리", "장흥리", "오지리", "상노리", "하갈리"],
+    "김화읍": ["와수리", "학사리", "청양리", "읍내리", "도창리"],
+    "철원읍": ["화지리", "월하리", "관전리", "율이리"],
+    "서면": ["와수리", "자등리", "등대리"],
+    "근남면": ["육단리", "잠곡리", "사곡리"]
+}
+
+MENU_TYPES = ["🍚 든든한 밥 (식사)", "🍖 고기/회 (구이/술)", "☕ 디저트/카페", "🛵 배달/포장"]
+GROUPS = ["혼밥", "2~4인", "단체"]
+RADIUS_RANGE_KM = (1.0, 10.0)
+
+# ============================================================================
+# 🔧 유틸리티
+# ============================================================================
+def process_cached(fn: Callable) -> Callable:
+    """인자별로 프로세스당 한 번만 만드는 공유 자원 (세션/스레드 간 공유)"""
+    resources: Dict[Tuple, Any] = {}
+    lock = threading.Lock()
+
+    @functools.wraps(fn)
+    def wrapper(*args):
+        try:
+            return resources[args]
+        except KeyError:
+            pass
+        with lock:
+            if args not in resources:
+                resources[args] = fn(*args)
+            return resources[args]
+
+    wrapper.cache_clear = resources.clear
+    return wrapper
+
+def clean_html(text: str) -> str:
+    if pd.isna(text): return ""
+    text = re.sub(r'<.*?>', '', text)
+    return text.replace('&quot;', '"').replace('&amp;', '&').strip()
+
+# ============================================================================
+# ⏱️ 지연 시간 계측 (API 호출/파이프라인 단계별 span)
+# ============================================================================
+TRACE_LOG = os.getenv('TRACE_LOG', '') == '1'   # span 마다 JSON 로그 한 줄 출력
+METRICS_PORT = int(os.getenv('METRICS_PORT', 0))   # 지정 시 Prometheus 텍스트 엔드포인트(/metrics) 실행
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+trace_logger = logging.getLogger('cheorwon.trace')
+if TRACE_LOG and not trace_logger.handlers:
+    trace_logger.addHandler(logging.StreamHandler())
+    trace_logger.setLevel(logging.INFO)
+    trace_logger.propagate = False
+
+class Trace:
+    """검색 한 번 동안 기록된 span 목록 (여러 스레드에서 추가)"""
+    def __init__(self, name: str):
+        self.name = name
+        self.trace_id = uuid.uuid4().hex[:12]
+        self.spans: List[Dict] = []
+        self._lock = threading.Lock()
+
+    def add(self, rec: Dict):
+        with self._lock:
+            self.spans.append(rec)
+
+    def to_frame(self) -> pd.DataFrame:
+        with self._lock:
+            return pd.DataFrame(self.spans)
+
+class LatencyMetrics:
+    """span 이름별 호출 수/오류 수/지연 히스토그램 (프로세스 누적)"""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._series: Dict[str, Dict] = {}
+
+    def observe(self, name: str, seconds: float, ok: bool):
+        with self._lock:
+            s = self._series.setdefault(name, {'count': 0, 'errors': 0, 'sum': 0.0, 'buckets': [0] * len(LATENCY_BUCKETS)})
+            s['count'] += 1
+            s['sum'] += seconds
+            if not ok: s['errors'] += 1
+            for i, le in enumerate(LATENCY_BUCKETS):
+                if seconds <= le: s['buckets'][i] += 1
+
+    def snapshot(self) -> Dict[str, Dict]:
+        with self._lock:
+            return {k: {**v, 'buckets': list(v['buckets'])} for k, v in self._series.items()}
+
+@process_cached
+def get_latency_metrics() -> LatencyMetrics:
+    return LatencyMetrics()
+
+_current_trace: ContextVar[Optional[Trace]] = ContextVar('current_trace', default=None)
+_current_span: ContextVar[Optional[Dict]] = ContextVar('current_span', default=None)
+
+@contextmanager
+def start_trace(name: str) -> Iterator[Trace]:
+    trace = Trace(name)
+    token = _current_trace.set(trace)
+    try:
+        yield trace
+    finally:
+        _current_trace.reset(token)
+
+@contextmanager
+def span(name: str, **attrs) -> Iterator[Dict]:
+    """with span('stage.places') as sp: sp['status_code'] = ... 처럼 속성 추가"""
+    trace, parent = _current_trace.get(), _current_span.get()
+    rec = {'name': name, 'parent': parent['name'] if parent else None, 'status': 'ok', **attrs}
+    token = _current_span.set(rec)
+    started = time.perf_counter()
+    try:
+        yield rec
+    except BaseException as e:
+        rec['status'] = 'error'
+        rec['error'] = type(e).__name__
+        raise
+    finally:
+        _current_span.reset(token)
+        _finish_span(rec, time.perf_counter() - started, trace)
+
+def record_span(name: str, seconds: float, **attrs):
+    """이미 측정한 구간을 span 으로 기록 (제너레이터처럼 with 로 감싸기 어려운 구간용)"""
+    parent = _current_span.get()
+    rec = {'name': name, 'parent': parent['name'] if parent else None, 'status': 'ok', **attrs}
+    _finish_span(rec, seconds, _current_trace.get())
+
+def _finish_span(rec: Dict, seconds: float, trace: Optional[Trace]):
+    rec['duration_ms'] = round(seconds * 1000, 2)
+    get_latency_metrics().observe(rec['name'], seconds, rec['status'] == 'ok')
+    if trace is not None:
+        rec['trace_id'] = trace.trace_id
+        trace.add(rec)
+    if TRACE_LOG:
+        trace_logger.info(json.dumps({'ts': time.time(), **rec}, ensure_ascii=False, default=str))
+
+def submit_in_context(ex: ThreadPoolExecutor, fn: Callable, *args) -> Future:
+    # 작업 스레드에서도 현재 trace/span 에 기록되도록 contextvars 를 복사해 실행
+    return ex.submit(contextvars.copy_context().run, fn, *args)
+
+# ============================================================================
+# 🔌 HTTP 클라이언트 (커넥션 풀 / 재시도 / 백오프)
+# ============================================================================
+KAKAO_API_BASE = os.getenv('KAKAO_API_BASE', 'https://dapi.kakao.com')
+NAVER_API_BASE = os.getenv('NAVER_API_BASE', 'https://openapi.naver.com')
+
+# 호스트별 keep-alive 커넥션 풀 크기
+HTTP_POOL_SIZES = {
+    KAKAO_API_BASE: int(os.getenv('KAKAO_POOL_SIZE', 10)),
+    NAVER_API_BASE: int(os.getenv('NAVER_POOL_SIZE', 20)),
+}
+
+# 엔드포인트별 (connect, read) 타임아웃
+HTTP_TIMEOUTS = {
+    'kakao.keyword': (2, 3),
+    'kakao.address': (2, 3),
+    'kakao.region': (2, 3),
+    'kakao.category': (2, 3),
+    'naver.blog': (2, 5),
+    'naver.blog_count': (2, 3),
+}
+HTTP_DEFAULT_TIMEOUT = (2, 3)
+
+HTTP_MAX_RETRIES = int(os.getenv('HTTP_MAX_RETRIES', 2))
+HTTP_BACKOFF_BASE = float(os.getenv('HTTP_BACKOFF_BASE', 0.3))
+HTTP_BACKOFF_MAX = float(os.getenv('HTTP_BACKOFF_MAX', 5.0))
+HTTP_RETRY_STATUS = {429, 500, 502, 503, 504}
+HTTP_OFFLINE = os.getenv('HTTP_OFFLINE') == '1'  # 외부 호출 없이 캐시(만료 포함)/인덱스만 사용 (배치 리포트 등)
+
+@process_cached
+def get_session() -> requests.Session:
+    """프로세스 공용 세션 (스레드/세션 간 커넥션 풀 재사용)"""
+    session = requests.Session()
+    for prefix, size in HTTP_POOL_SIZES.items():
+        session.mount(prefix, HTTPAdapter(pool_connections=1, pool_maxsize=size))
+    return session
+
+def _backoff_delay(attempt: int, res: Optional[requests.Response]) -> float:
+    # 429의 Retry-After 우선, 없으면 full jitter 지수 백오프
+    retry_after = res.headers.get('Retry-After', '') if res is not None else ''
+    if retry_after.isdigit():
+        return min(float(retry_after), HTTP_BACKOFF_MAX)
+    return random.uniform(0, min(HTTP_BACKOFF_MAX, HTTP_BACKOFF_BASE * (2 ** attempt)))
+
+def http_get(endpoint: str, url: str, headers: Optional[Dict] = None,
+             params: Optional[Dict] = None) -> Optional[requests.Response]:
+    """429/5xx/연결 오류는 재시도, 최종 실패 시 마지막 응답(또는 None) 반환"""
+    timeout = HTTP_TIMEOUTS.get(endpoint, HTTP_DEFAULT_TIMEOUT)
+    quota = get_quota(endpoint.split('.')[0])
+    res = None
+    with span(f"http.{endpoint}", retries=0) as sp:
+        if HTTP_OFFLINE:
+            sp.update(status='error', error='offline')
+            return None
+        for attempt in range(HTTP_MAX_RETRIES + 1):
+            sp['retries'] = attempt
+            rejected = quota.acquire()  # 재시도도 한 번의 호출로 계산
+            if rejected:
+                sp['error'] = f"quota_{rejected}"
+                res = None
+                break
+            try:
+                res = get_session().get(url, headers=headers, params=params, timeout=timeout)
+                sp['status_code'] = res.status_code
+                if res.status_code not in HTTP_RETRY_STATUS:
+                    break
+            except requests.RequestException as e:
+                res = None
+                sp['error'] = type(e).__name__
+            if attempt < HTTP_MAX_RETRIES:
+                time.sleep(_backoff_delay(attempt, res))
+        if res is None or res.status_code >= 400:
+            sp['status'] = 'error'
+    return res
+
+# ============================================================================
+# 🗄️ 응답 캐시 (엔드포인트별 TTL + 용량 기반 LRU)
+# ============================================================================
+# 엔드포인트별 TTL (초)
+CACHE_TTLS = {
+    'coords': int(os.getenv('CACHE_TTL_COORDS', 7 * 24 * 3600)),
+    'region': int(os.getenv('CACHE_TTL_REGION', 7 * 24 * 3600)),
+    'places': int(os.getenv('CACHE_TTL_PLACES', 6 * 3600)),
+    'blog_count': int(os.getenv('CACHE_TTL_BLOG_COUNT', 24 * 3600)),
+    'blogs': int(os.getenv('CACHE_TTL_BLOGS', 24 * 3600)),
+}
+CACHE_MAX_BYTES = int(os.getenv('CACHE_MAX_BYTES', 64 * 1024 * 1024))
+CACHE_DB_PATH = os.getenv('CACHE_DB_PATH')  # 지정 시 SQLite 디스크 캐시 사용 (재시작 후에도 유지)
+# 만료 전 미리 갱신 (남은 TTL 이 이 비율 아래로 떨어지면 기존 값을 쓰면서 백그라운드 갱신)
+REFRESH_AHEAD_RATIO = float(os.getenv('REFRESH_AHEAD_RATIO', 0.2))
+REFRESH_AHEAD_NAMESPACES = ('coords', 'region', 'places')
+REFRESH_MAX_WORKERS = int(os.getenv('REFRESH_MAX_WORKERS', 4))
+
+class MemoryCacheBackend:
+    """프로세스 메모리 캐시 (직렬화된 바이트 기준 용량 제한, LRU 제거)"""
+    def __init__(self, max_bytes: int = CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._data: 'OrderedDict[str, Tuple[float, bytes]]' = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Tuple[float, bytes]]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                self._data.move_to_end(key)
+            return entry
+
+    def set(self, key: str, blob: bytes, expires_at: float):
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self._bytes -= len(old[1])
+            self._data[key] = (expires_at, blob)
+            self._bytes += len(blob)
+            while self._bytes > self.max_bytes and len(self._data) > 1:
+                _, (_, evicted) = self._data.popitem(last=False)
+                self._bytes -= len(evicted)
+
+    def delete(self, key: str):
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self._bytes -= len(old[1])
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+
+    def items(self) -> List[Tuple[str, float, bytes]]:
+        with self._lock:
+            return [(key, expires_at, blob) for key, (expires_at, blob) in self._data.items()]
+
+class SQLiteCacheBackend:
+    """SQLite 디스크 캐시 (마지막 접근 시각 기준 LRU 제거)"""
+    def __init__(self, path: str, max_bytes: int = CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                " key TEXT PRIMARY KEY, expires_at REAL, accessed_at REAL, size INTEGER, value BLOB)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS cache_accessed ON cache(accessed_at)")
+            # 전체 크기는 한 번만 합산하고 이후 삽입/삭제 때 증감 (삽입마다 SUM 스캔 방지)
+            self._bytes = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM cache").fetchone()[0]
+
+    def get(self, key: str) -> Optional[Tuple[float, bytes]]:
+        with self._lock, self._conn:
+            row = self._conn.execute("SELECT expires_at, value FROM cache WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                self._conn.execute("UPDATE cache SET accessed_at = ? WHERE key = ?", (time.time(), key))
+            return row
+
+    def set(self, key: str, blob: bytes, expires_at: float):
+        with self._lock:
+            with self._conn:  # 트랜잭션이 커밋된 뒤에만 합계 반영
+                old = self._conn.execute("SELECT size FROM cache WHERE key = ?", (key,)).fetchone()
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO cache (key, expires_at, accessed_at, size, value) VALUES (?, ?, ?, ?, ?)",
+                    (key, expires_at, time.time(), len(blob), sqlite3.Binary(blob))
+                )
+                total = self._bytes + len(blob) - (old[0] if old else 0)
+                while total > self.max_bytes:
+                    row = self._conn.execute(
+                        "SELECT key, size FROM cache WHERE key != ? ORDER BY accessed_at LIMIT 1", (key,)
+                    ).fetchone()
+                    if row is None: break
+                    self._conn.execute("DELETE FROM cache WHERE key = ?", (row[0],))
+                    total -= row[1]
+            self._bytes = total
+
+    def delete(self, key: str):
+        with self._lock:
+            with self._conn:
+                row = self._conn.execute("SELECT size FROM cache WHERE key = ?", (key,)).fetchone()
+                self._conn.execute("DELETE FROM cache WHERE key = ?", (key,))
+            if row is not None:
+                self._bytes -= row[0]
+
+    def clear(self):
+        with self._lock:
+            with self._conn:
+                self._conn.execute("DELETE FROM cache")
+            self._bytes = 0
+
+    def items(self) -> List[Tuple[str, float, bytes]]:
+        with self._lock:
+            return [(k, e, bytes(v)) for k, e, v in
+                    self._conn.execute("SELECT key, expires_at, value FROM cache ORDER BY accessed_at")]
+
+class SingleFlight:
+    """같은 키의 동시 요청은 하나만 실행하고 나머지는 그 결과를 기다림 (스레드 간 공유)"""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[str, Future] = {}
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Tuple[Any, bool]:
+        """(결과, 다른 호출에 합류했는지) 반환"""
+        with self._lock:
+            fut = self._calls.get(key)
+            leader = fut is None
+            if leader:
+                fut = self._calls[key] = Future()
+        if not leader:
+            return fut.result(), True
+        try:
+            value = fn()
+            fut.set_result(value)
+            return value, False
+        except BaseException as e:
+            fut.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+@process_cached
+def get_refresh_executor() -> ThreadPoolExecutor:
+    """만료 전 갱신(stale-while-revalidate) 전용 백그라운드 스레드 (사용자 요청 추적과 분리)"""
+    return ThreadPoolExecutor(max_workers=REFRESH_MAX_WORKERS, thread_name_prefix='cache-refresh')
+
+class ResponseCache:
+    """네임스페이스(엔드포인트)별 TTL 적용 + 적중/실패 카운터
+    revalidate 네임스페이스는 만료가 가까운 값(또는 만료 후 TTL 한 번 이내의 값)을
+    바로 돌려주고 백그라운드에서 다시 받아 옴"""
+    def __init__(self, backend, ttls: Dict[str, int], revalidate: Tuple[str, ...] = ()):
+        self.backend = backend
+        self.ttls = ttls
+        self.revalidate = revalidate
+        self._stats: Dict[str, Dict[str, int]] = {}
+        self._lock = threading.Lock()
+        self._flight = SingleFlight()
+        self._refreshing: set = set()
+
+    @staticmethod
+    def make_key(namespace: str, key_parts) -> str:
+        return f"{namespace}:{json.dumps(key_parts, ensure_ascii=False)}"
+
+    def _count(self, namespace: str, field: str):
+        with self._lock:
+            ns = self._stats.setdefault(namespace, {'hits': 0, 'misses': 0, 'coalesced': 0, 'stale': 0, 'refreshed': 0})
+            ns[field] += 1
+
+    def get(self, namespace: str, key_parts) -> Any:
+        entry = self.backend.get(self.make_key(namespace, key_parts))
+        if entry is not None and entry[0] > time.time():
+            self._count(namespace, 'hits')
+            return pickle.loads(entry[1])
+        self._count(namespace, 'misses')
+        return None
+
+    def get_stale(self, namespace: str, key_parts) -> Any:
+        """만료 여부와 관계없이 남아 있는 값 (네트워크 없이 쓸 수 있는 최선의 값)"""
+        entry = self.backend.get(self.make_key(namespace, key_parts))
+        return pickle.loads(entry[1]) if entry is not None else None
+
+    def set(self, namespace: str, key_parts, value: Any):
+        key = self.make_key(namespace, key_parts)
+        self.backend.set(key, pickle.dumps(value), time.time() + self.ttls.get(namespace, 3600))
+
+    def ttl_left(self, namespace: str, key_parts) -> Optional[float]:
+        """남은 유효 시간 (초, 만료됐으면 음수 / 없으면 None)"""
+        entry = self.backend.get(self.make_key(namespace, key_parts))
+        return entry[0] - time.time() if entry is not None else None
+
+    def export(self, namespaces: Tuple[str, ...]) -> List[Tuple[str, float, bytes]]:
+        """스냅샷용 (키, 만료 시각, 직렬화 값) 목록"""
+        prefixes = tuple(f"{ns}:" for ns in namespaces)
+        return [item for item in self.backend.items() if item[0].startswith(prefixes)]
+
+    def restore(self, entries: List[Tuple[str, float, bytes]]) -> int:
+        """스냅샷 항목을 비어 있는 키에만 채움 (만료된 항목도 stale 후보로 보관)"""
+        restored = 0
+        for key, expires_at, blob in entries:
+            if self.backend.get(key) is None:
+                self.backend.set(key, blob, expires_at)
+                restored += 1
+        return restored
+
+    def _peek(self, key: str) -> Optional[bytes]:
+        entry = self.backend.get(key)
+        return entry[1] if entry is not None and entry[0] > time.time() else None
+
+    def get_or_fetch(self, namespace: str, key_parts, fetch: Callable[[], Any]) -> Any:
+        # fetch()가 None을 반환하면(실패) 캐시하지 않음
+        # 미스 시 같은 키의 동시 요청은 single-flight 로 한 번만 호출하고,
+        # 각 호출자는 직렬화된 결과를 따로 풀어 받음 (결과 객체를 공유하지 않음)
+        with span(f"cache.{namespace}", cache='hit') as sp:
+            if namespace in self.revalidate:
+                value = self._get_revalidating(namespace, key_parts, fetch, sp)
+            else:
+                value = self.get(namespace, key_parts)
+            if value is not None:
+                return value
+            value, sp['cache'] = self._fetch_shared(namespace, key_parts, fetch)
+            if value is None:
+                # 호출 실패/한도 초과 시 만료된 값이라도 있으면 사용 (stale-if-error)
+                value = self.get_stale(namespace, key_parts)
+                if value is not None:
+                    sp['cache'] = 'stale'
+                    self._count(namespace, 'stale')
+            return value
+
+    def _get_revalidating(self, namespace: str, key_parts, fetch: Callable[[], Any], sp: Dict) -> Any:
+        key = self.make_key(namespace, key_parts)
+        entry = self.backend.get(key)
+        ttl = self.ttls.get(namespace, 3600)
+        left = entry[0] - time.time() if entry is not None else None
+        if left is None or left <= -ttl:
+            self._count(namespace, 'misses')
+            return None
+        if left < ttl * REFRESH_AHEAD_RATIO:
+            sp['refresh'] = self._refresh(namespace, key, fetch)
+        if left > 0:
+            self._count(namespace, 'hits')
+        else:
+            sp['cache'] = 'stale'
+            self._count(namespace, 'stale')
+        return pickle.loads(entry[1])
+
+    def _refresh(self, namespace: str, key: str, fetch: Callable[[], Any]) -> bool:
+        """키당 하나의 백그라운드 갱신만 예약 (이미 진행 중이면 False)"""
+        with self._lock:
+            if key in self._refreshing: return False
+            self._refreshing.add(key)
+
+        def _run():
+            try:
+                with span(f"refresh.{namespace}"):  # 실패해도 span 오류로만 기록 (기존 값 유지)
+                    value = fetch()
+                if value is not None:
+                    self.backend.set(key, pickle.dumps(value), time.time() + self.ttls.get(namespace, 3600))
+                    self._count(namespace, 'refreshed')
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        get_refresh_executor().submit(_run)
+        return True
+
+    def _fetch_shared(self, namespace: str, key_parts, fetch: Callable[[], Any]) -> Tuple[Any, str]:
+        key = self.make_key(namespace, key_parts)
+
+        def _load() -> Optional[bytes]:
+            blob = self._peek(key)  # 앞선 요청이 방금 채웠을 수 있음
+            if blob is None:
+                value = fetch()
+                if value is None: return None
+                blob = pickle.dumps(value)
+                self.backend.set(key, blob, time.time() + self.ttls.get(namespace, 3600))
+            return blob
+
+        blob, coalesced = self._flight.do(key, _load)
+        if coalesced:
+            self._count(namespace, 'coalesced')
+        return (pickle.loads(blob) if blob is not None else None), ('coalesced' if coalesced else 'miss')
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        with self._lock:
+            return {ns: dict(v) for ns, v in self._stats.items()}
+
+@process_cached
+def get_response_cache() -> ResponseCache:
+    backend = SQLiteCacheBackend(CACHE_DB_PATH) if CACHE_DB_PATH else MemoryCacheBackend()
+    return ResponseCache(backend, CACHE_TTLS, revalidate=REFRESH_AHEAD_NAMESPACES)
+
+# ============================================================================
+# 🚦 호출 한도 (키별 토큰 버킷 + 일일 예산)
+# ============================================================================
+# API 종류별 (초당 호출 수, 버스트) / 일일 예산 - 워커 프로세스가 여럿이면 초당 한도는 워커 수로 나눠 설정
+RATE_LIMITS = {
+    'kakao': (float(os.getenv('KAKAO_RATE_PER_SEC', 30)), int(os.getenv('KAKAO_RATE_BURST', 30))),
+    'naver': (float(os.getenv('NAVER_RATE_PER_SEC', 10)), int(os.getenv('NAVER_RATE_BURST', 10))),
+}
+DAILY_BUDGETS = {
+    'kakao': int(os.getenv('KAKAO_DAILY_BUDGET', 100000)),
+    'naver': int(os.getenv('NAVER_DAILY_BUDGET', 25000)),
+}
+BUDGET_LOW_RATIO = float(os.getenv('BUDGET_LOW_RATIO', 0.1))   # 남은 예산이 이 비율 아래면 보강 축소
+RATE_WAIT_MAX = float(os.getenv('RATE_WAIT_MAX', 5.0))          # 토큰을 기다리는 최대 시간 (초)
+KST = timezone(timedelta(hours=9))                              # 일일 한도는 한국 시간 자정에 초기화
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, timeout: float = RATE_WAIT_MAX) -> bool:
+        deadline = time.monotonic() + timeout
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return True
+                wait = (1 - self._tokens) / self.rate
+            if now + wait > deadline:
+                return False
+            time.sleep(wait)
+
+class DailyBudget:
+    """일일 호출 수 집계 (CACHE_DB_PATH 가 있으면 SQLite 로 프로세스 간 공유/재시작 후 유지)"""
+    def __init__(self, api: str, key: str, limit: int, db_path: Optional[str] = None):
+        self.api = api
+        self.key_id = hashlib.sha256(key.encode('utf-8')).hexdigest()[:16]  # 키 원문은 저장하지 않음
+        self.limit = limit
+        self._lock = threading.Lock()
+        self._day = self._today()
+        self._used = 0
+        self._conn = None
+        if db_path:
+            self._conn = sqlite3.connect(db_path, check_same_thread=False)
+            with self._conn:
+                self._conn.execute("CREATE TABLE IF NOT EXISTS quota (day TEXT, key_id TEXT, used INTEGER, PRIMARY KEY (day, key_id))")
+
+    @staticmethod
+    def _today() -> str:
+        return datetime.now(KST).strftime('%Y-%m-%d')
+
+    def _roll(self):
+        today = self._today()
+        if today != self._day:
+            self._day, self._used = today, 0
+
+    def try_consume(self, n: int = 1) -> bool:
+        with self._lock:
+            self._roll()
+            if self._conn is not None:
+                with self._conn:
+                    self._conn.execute("INSERT OR IGNORE INTO quota (day, key_id, used) VALUES (?, ?, 0)", (self._day, self.key_id))
+                    cur = self._conn.execute("UPDATE quota SET used = used + ? WHERE day = ? AND key_id = ? AND used + ? <= ?",
+                                             (n, self._day, self.key_id, n, self.limit))
+                    self._used = self._conn.execute("SELECT used FROM quota WHERE day = ? AND key_id = ?",
+                                                    (self._day, self.key_id)).fetchone()[0]
+                    return cur.rowcount == 1
+            if self._used + n > self.limit:
+                return False
+            self._used += n
+            return True
+
+    def used(self) -> int:
+        with self._lock:
+            self._roll()
+            return self._used
+
+    def remaining(self) -> int:
+        return max(0, self.limit - self.used())
+
+class QuotaGuard:
+    """API 키 하나의 초당 한도 + 일일 예산"""
+    def __init__(self, api: str, key: str):
+        rate, burst = RATE_LIMITS[api]
+        self.api = api
+        self.bucket = TokenBucket(rate, burst)
+        self.budget = DailyBudget(api, key, DAILY_BUDGETS[api], CACHE_DB_PATH)
+        self.rejected = {'rate': 0, 'budget': 0}
+        self._lock = threading.Lock()
+
+    def acquire(self) -> Optional[str]:
+        """호출 가능하면 None, 아니면 거절 사유 ('budget' / 'rate')
+        예산은 속도 제한을 통과해 실제로 보낼 호출만 차감 (소진 여부는 먼저 확인해 헛대기 방지)"""
+        reason = None
+        if self.budget.remaining() <= 0:
+            reason = 'budget'
+        elif not self.bucket.acquire():
+            reason = 'rate'
+        elif not self.budget.try_consume():
+            reason = 'budget'
+        if reason:
+            with self._lock:
+                self.rejected[reason] += 1
+        return reason
+
+    def mode(self) -> str:
+        """'ok' / 'low'(남은 예산 BUDGET_LOW_RATIO 미만) / 'exhausted'"""
+        remaining = self.budget.remaining()
+        if remaining <= 0: return 'exhausted'
+        if remaining < self.budget.limit * BUDGET_LOW_RATIO: return 'low'
+        return 'ok'
+
+@process_cached
+def _quota_guard(api: str, key: str) -> QuotaGuard:
+    return QuotaGuard(api, key)
+
+def get_quota(api: str) -> QuotaGuard:
+    # 같은 키를 쓰는 모든 세션/스레드가 한도를 공유
+    key = API_KEYS['KAKAO_REST_API_KEY'] if api == 'kakao' else API_KEYS['NAVER_SERVICE_CLIENT_ID']
+    return _quota_guard(api, key or '')
+
+# ============================================================================
+# 📈 메트릭 내보내기 (Prometheus 텍스트 형식)
+# ============================================================================
+def render_prometheus() -> str:
+    lines = [
+        "# TYPE cheorwon_span_duration_seconds histogram",
+    ]
+    snapshot = get_latency_metrics().snapshot()
+    for name, s in sorted(snapshot.items()):
+        for le, cnt in zip(LATENCY_BUCKETS, s['buckets']):
+            lines.append(f'cheorwon_span_duration_seconds_bucket{{span="{name}",le="{le}"}} {cnt}')
+        lines.append(f'cheorwon_span_duration_seconds_bucket{{span="{name}",le="+Inf"}} {s["count"]}')
+        lines.append(f'cheorwon_span_duration_seconds_sum{{span="{name}"}} {s["sum"]:.6f}')
+        lines.append(f'cheorwon_span_duration_seconds_count{{span="{name}"}} {s["count"]}')
+    lines.append("# TYPE cheorwon_span_errors_total counter")
+    for name, s in sorted(snapshot.items()):
+        lines.append(f'cheorwon_span_errors_total{{span="{name}"}} {s["errors"]}')
+    lines.append("# TYPE cheorwon_quota_remaining gauge")
+    for api in DAILY_BUDGETS:
+        lines.append(f'cheorwon_quota_remaining{{api="{api}"}} {get_quota(api).budget.remaining()}')
+    lines.append("# TYPE cheorwon_quota_daily_budget gauge")
+    for api, limit in DAILY_BUDGETS.items():
+        lines.append(f'cheorwon_quota_daily_budget{{api="{api}"}} {limit}')
+    lines.append("# TYPE cheorwon_quota_rejected_total counter")
+    for api in DAILY_BUDGETS:
+        for reason, cnt in get_quota(api).rejected.items():
+            lines.append(f'cheorwon_quota_rejected_total{{api="{api}",reason="{reason}"}} {cnt}')
+    lines.append("# TYPE cheorwon_cache_requests_total counter")
+    for ns, stats in sorted(get_response_cache().stats().items()):
+        for result, cnt in stats.items():
+            lines.append(f'cheorwon_cache_requests_total{{namespace="{ns}",result="{result}"}} {cnt}')
+    return "\n".join(lines) + "\n"
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split('?')[0] != '/metrics':
+            self.send_error(404)
+            return
+        body = render_prometheus().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+@process_cached
+def start_metrics_server(port: int) -> ThreadingHTTPServer:
+    """프로세스당 한 번만 /metrics 서버를 데몬 스레드로 실행"""
+    server = ThreadingHTTPServer(('0.0.0.0', port), _MetricsHandler)
+    threading.Thread(target=server.serve_forever, name='metrics-server', daemon=True).start()
+    return server
+
+# ============================================================================
+# 🌐 카카오 API (지도/위치/맛집)
+# ============================================================================
+KAKAO_PAGE_SIZE = 15
+KAKAO_MAX_PAGES = 3                  # 카테고리 검색은 최대 45건(15개 x 3페이지)까지만 조회 가능
+KAKAO_MAX_CONCURRENCY = int(os.getenv('KAKAO_MAX_CONCURRENCY', 8))
+RECT_SPLIT_MAX_DEPTH = int(os.getenv('RECT_SPLIT_MAX_DEPTH', 3))  # 4등분 반복 횟수 (최대 4^3 영역)
+
+class KakaoAPI:
+    def __init__(self):
+        self.key = API_KEYS['KAKAO_REST_API_KEY']
+        self.headers = {"Authorization": f"KakaoAK {self.key}"}
+
+    def test_api(self) -> Tuple[bool, str]:
+        url = f"{KAKAO_API_BASE}/v2/local/search/keyword.json"
+        res = http_get('kakao.keyword', url, headers=self.headers, params={"query": "테스트", "size": 1})
+        if res is None: return False, "연결 실패"
+        if res.status_code == 200: return True, "정상"
+        return False, f"오류 {res.status_code}"
+
+    def kakao_rest_api(self, longitude, latitude):
+        key = [round(float(longitude), 6), round(float(latitude), 6)]
+        return get_response_cache().get_or_fetch('region', key, lambda: self._fetch_region(longitude, latitude))
+
+    def _fetch_region(self, longitude, latitude):
+        url = f"{KAKAO_API_BASE}/v2/local/geo/coord2regioncode.json"
+        res = http_get('kakao.region', url, headers=self.headers, params={"x": longitude, "y": latitude})
+        try:
+            if res is not None and res.status_code == 200: return res.json()
+        except ValueError: pass
+        return None
+
+    def get_coords(self, query: str) -> Optional[Tuple[float, float, str]]:
+        coords = get_response_cache().get_or_fetch('coords', query, lambda: self._fetch_coords(query))
+        return tuple(coords) if coords else None
+
+    def _fetch_coords(self, query: str) -> Optional[Tuple[float, float, str]]:
+        try:
+            url = f"{KAKAO_API_BASE}/v2/local/search/keyword.json"
+            res = http_get('kakao.keyword', url, headers=self.headers, params={"query": query})
+            if res is not None and res.status_code == 200 and res.json()['meta']['total_count'] > 0:
+                doc = res.json()['documents'][0]
+                return float(doc['y']), float(doc['x']), doc['place_name']
+            
+            url = f"{KAKAO_API_BASE}/v2/local/search/address.json"
+            res = http_get('kakao.address', url, headers=self.headers, params={"query": query})
+            if res is not None and res.status_code == 200 and res.json()['meta']['total_count'] > 0:
+                doc = res.json()['documents'][0]
+                return float(doc['y']), float(doc['x']), doc['address_name']
+        except (ValueError, KeyError, IndexError):
+            pass
+        return None
+
+    def search_restaurants(self, lat: float, lon: float, radius: int) -> List[Dict]:
+        return self.search_restaurants_with_coverage(lat, lon, radius)[0]
+
+    def search_restaurants_with_coverage(self, lat: float, lon: float, radius: int) -> Tuple[List[Dict], int]:
+        """(거리순 식당 목록, 빠짐없이 수집된 반경 m) - 결과가 잘렸으면 반경보다 작음"""
+        key = ['paged', round(lat, 6), round(lon, 6), int(radius)]
+        found = get_response_cache().get_or_fetch('places', key, lambda: self._fetch_restaurants(lat, lon, radius))
+        return (found['places'], found['coverage']) if found else ([], 0)
+
+    def _fetch_category_pages(self, ex: ThreadPoolExecutor, areas: List[Dict]) -> List[Optional[Dict]]:
+        """영역(반경 또는 rect)별 1페이지를 동시에 받고, meta 로 남은 페이지 수를 계산해 다시 동시에 받음
+        각 영역 결과: {'docs', 'total', 'pageable', 'complete'} / 1페이지 실패 시 None"""
+        def _page(area: Dict, page: int) -> Optional[Dict]:
+            params = {"category_group_code": "FD6", "x": area['lon'], "y": area['lat'],
+                      "size": KAKAO_PAGE_SIZE, "page": page, "sort": "distance"}
+            params.update({'rect': area['rect']} if 'rect' in area else {'radius': area['radius']})
+            res = http_get('kakao.category', f"{KAKAO_API_BASE}/v2/local/search/category.json",
+                           headers=self.headers, params=params)
+            try:
+                return res.json() if res is not None and res.status_code == 200 else None
+            except ValueError:
+                return None
+
+        results: List[Optional[Dict]] = []
+        first_pages = [submit_in_context(ex, _page, area, 1) for area in areas]
+        rest = []
+        for area, fut in zip(areas, first_pages):
+            body = fut.result()
+            if body is None:
+                results.append(None)
+                rest.append([])
+                continue
+            meta = body.get('meta', {})
+            pageable = min(meta.get('pageable_count', 0), KAKAO_PAGE_SIZE * KAKAO_MAX_PAGES)
+            last_page = 1 if meta.get('is_end', True) else -(-pageable // KAKAO_PAGE_SIZE)
+            results.append({'docs': body.get('documents', []), 'total': meta.get('total_count', 0),
+                            'pageable': pageable, 'complete': True})
+            rest.append([submit_in_context(ex, _page, area, page) for page in range(2, last_page + 1)])
+
+        for result, futures in zip(results, rest):
+            for fut in futures:
+                body = fut.result()
+                if body is None:  # 중간 페이지 실패 → 받은 데까지만 (거리순이므로 앞쪽은 온전함)
+                    result['complete'] = False
+                    break
+                result['docs'].extend(body.get('documents', []))
+        return results
+
+    def _fetch_restaurants(self, lat: float, lon: float, radius: int) -> Optional[Dict]:
+        """반경 검색 1회 → 결과가 45개 상한에 잘리면 외접 사각형을 4등분한 rect 검색으로 재귀 분할
+        (분할 단계마다 영역들을 동시에 조회, id 로 중복 제거). 첫 검색이 실패하면 None (캐시하지 않음)"""
+        dlat = radius / 111320.0
+        dlon = radius / (111320.0 * max(np.cos(np.radians(lat)), 1e-6))
+        level = [{'lat': lat, 'lon': lon, 'radius': radius, 'bounds': (lon - dlon, lat - dlat, lon + dlon, lat + dlat)}]
+        docs: Dict[str, Dict] = {}
+        coverage = radius
+
+        try:
+            with ThreadPoolExecutor(max_workers=KAKAO_MAX_CONCURRENCY) as ex:
+                for depth in range(RECT_SPLIT_MAX_DEPTH + 1):
+                    results = self._fetch_category_pages(ex, level)
+                    if depth == 0 and results[0] is None:
+                        return None
+                    next_level = []
+                    for area, result in zip(level, results):
+                        if result is None:  # 하위 영역 조회 실패 → 완전성 보장 불가
+                            coverage = 0
+                            continue
+                        truncated = result['total'] > result['pageable']
+                        if truncated and depth < RECT_SPLIT_MAX_DEPTH:
+                            next_level.extend(self._split_area(area))
+                            continue
+                        for d in result['docs']:
+                            docs.setdefault(d.get('id') or f"{d.get('place_name')}@{d.get('x')},{d.get('y')}", d)
+                        if truncated or not result['complete']:
+                            # 이 영역은 받은 결과 중 가장 먼 거리까지만 온전함
+                            reach = max((int(d.get('distance') or 0) for d in result['docs']), default=0)
+                            coverage = min(coverage, reach)
+                    if not next_level:
+                        break
+                    level = next_level
+
+            places = [{
+                'id': d.get('id'),
+                'name': d.get('place_name'),
+                'category': d.get('category_name', '').split(' > ')[-1],
+                'cat_full': d.get('category_name', ''),
+                'address': d.get('road_address_name') or d.get('address_name'),
+                'phone': d.get('phone'),
+                'distance': int(d.get('distance', 0)),
+                'lat': float(d.get('y')),
+                'lon': float(d.get('x')),
+                'url': d.get('place_url')
+            } for d in docs.values()]
+        except (ValueError, TypeError):
+            return None
+
+        places = [p for p in places if p['distance'] <= radius]
+        places.sort(key=lambda p: p['distance'])
+        return {'places': places, 'coverage': coverage}
+
+    @staticmethod
+    def _split_area(area: Dict) -> List[Dict]:
+        min_x, min_y, max_x, max_y = area['bounds']
+        mid_x, mid_y = (min_x + max_x) / 2, (min_y + max_y) / 2
+        quads = [(min_x, min_y, mid_x, mid_y), (mid_x, min_y, max_x, mid_y),
+                 (min_x, mid_y, mid_x, max_y), (mid_x, mid_y, max_x, max_y)]
+        return [{'lat': area['lat'], 'lon': area['lon'], 'bounds': q,
+                 'rect': ",".join(f"{v:.7f}" for v in q)} for q in quads]
+
+# ============================================================================
+# 📝 네이버 블로그/평점
+# ============================================================================
+def _naver_headers() -> Dict[str, str]:
+    return {"X-Naver-Client-Id": API_KEYS['NAVER_SERVICE_CLIENT_ID'] or '',
+            "X-Naver-Client-Secret": API_KEYS['NAVER_SERVICE_CLIENT_SECRET'] or ''}
+
+def test_naver_api() -> Tuple[bool, str]:
+    url = f"{NAVER_API_BASE}/v1/search/blog.json"
+    res = http_get('naver.blog', url, headers=_naver_headers(), params={"query": "테스트", "display": 1})
+    if res is None: return False, "연결 실패"
+    if res.status_code == 200: return True, "정상"
+    return False, "오류"
+
+def search_blogs(keyword: str, count: int = 5) -> pd.DataFrame:
+    items = get_response_cache().get_or_fetch('blogs', [keyword, count], lambda: _fetch_blog_items(keyword, count))
+    if items:
+        df = pd.DataFrame(items)
+        df['title_clean'] = df['title'].apply(clean_html)
+        df['desc_clean'] = df['description'].apply(clean_html)
+        return df
+    return pd.DataFrame()
+
+def _fetch_blog_items(keyword: str, count: int) -> Optional[List[Dict]]:
+    try:
+        url = f"{NAVER_API_BASE}/v1/search/blog"
+        params = {"query": f"{keyword} 철원 맛집", "display": count, "sort": "sim"}
+        res = http_get('naver.blog', url, headers=_naver_headers(), params=params)
+        if res is not None and res.status_code == 200:
+            return res.json().get('items', [])
+    except ValueError: pass
+    return None
+
+def get_blog_count(keyword: str) -> int:
+    return lookup_blog_count(keyword) or 0
+
+def lookup_blog_count(keyword: str) -> Optional[int]:
+    # 조회 실패(캐시에도 없음)면 0 대신 None
+    return get_response_cache().get_or_fetch('blog_count', keyword, lambda: _fetch_blog_count(keyword))
+
+def peek_blog_count(keyword: str) -> Optional[int]:
+    # 네트워크 없이 캐시(만료 포함)에 남은 블로그 수만 확인
+    return get_response_cache().get_stale('blog_count', keyword)
+
+def _fetch_blog_count(keyword: str) -> Optional[int]:
+    try:
+        url = f"{NAVER_API_BASE}/v1/search/blog"
+        params = {"query": f"{keyword} 철원 맛집", "display": 1}
+        res = http_get('naver.blog_count', url, headers=_naver_headers(), params=params)
+        if res is not None and res.status_code == 200: return res.json().get('total', 0)
+    except ValueError: pass
+    return None
+
+def get_naver_rating(keyword: str) -> float:
+    try:
+        return random.uniform(3.0, 5.0)
+    except: return 0.0
+
+# ============================================================================
+# ⚡ 병렬 수집 (블로그 수 일괄 조회)
+# ============================================================================
+ENRICH_MAX_WORKERS = int(os.getenv('ENRICH_MAX_WORKERS', 16))
+NAVER_MAX_CONCURRENCY = int(os.getenv('NAVER_MAX_CONCURRENCY', 8))
+
+# 키별 동시 요청 제한 (세션/스레드 공용)
+@process_cached
+def _key_semaphore(key: str, limit: int) -> threading.BoundedSemaphore:
+    return threading.BoundedSemaphore(limit)
+
+def iter_blog_counts(names: List[str], max_workers: int = ENRICH_MAX_WORKERS,
+                     lookup: Callable[[str], Optional[int]] = get_blog_count) -> Iterator[Tuple[int, Optional[int]]]:
+    """후보 전체의 블로그 수를 병렬 조회, 완료되는 대로 (입력 위치, 블로그 수) yield"""
+    if not names: return
+    sem = _key_semaphore(API_KEYS['NAVER_SERVICE_CLIENT_ID'] or '', NAVER_MAX_CONCURRENCY)
+
+    def _fetch(name: str) -> Optional[int]:
+        with sem:
+            return lookup(name)
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(names))) as ex:
+        futures = {submit_in_context(ex, _fetch, name): i for i, name in enumerate(names)}
+        for fut in as_completed(futures):
+            yield futures[fut], fut.result()
+
+def fetch_blog_counts(names: List[str], max_workers: int = ENRICH_MAX_WORKERS,
+                      lookup: Callable[[str], Optional[int]] = get_blog_count) -> List[Optional[int]]:
+    """후보 전체의 블로그 수를 한 번에 조회 (입력 순서대로 반환)"""
+    counts: List[Optional[int]] = [0] * len(names)
+    for i, cnt in iter_blog_counts(names, max_workers, lookup):
+        counts[i] = cnt
+    return counts
+
+REVIEW_STORE_MAX = 200  # 세션별 리뷰 저장소 최대 식당 수
+
+def prefetch_blog_reviews(names: List[str], store: Dict[str, pd.DataFrame],
+                          max_workers: int = ENRICH_MAX_WORKERS) -> Dict[str, pd.DataFrame]:
+    """상위 추천들의 블로그 리뷰를 병렬로 미리 조회해 store(식당 이름 키)에 채움
+    (이미 있는 이름은 건너뛰므로 재실행 시 네트워크 호출 없음)"""
+    todo = [n for n in dict.fromkeys(names) if n not in store]
+    if todo:
+        sem = _key_semaphore(API_KEYS['NAVER_SERVICE_CLIENT_ID'] or '', NAVER_MAX_CONCURRENCY)
+
+        def _fetch(name: str) -> pd.DataFrame:
+            with sem:
+                return search_blogs(name)
+
+        with span('stage.reviews', count=len(todo)), ThreadPoolExecutor(max_workers=min(max_workers, len(todo))) as ex:
+            futures = [submit_in_context(ex, _fetch, name) for name in todo]
+            for name, fut in zip(todo, futures):
+                store[name] = fut.result()
+    # 오래된 항목부터 제거
+    for name in list(store)[:max(0, len(store) - REVIEW_STORE_MAX)]:
+        del store[name]
+    return store
+
+# ============================================================================
+# 🗺️ 오프라인 식당 인덱스 (읍/리 전체 사전 수집 + 격자 검색)
+# ============================================================================
+INDEX_PATH = os.getenv('RESTAURANT_INDEX_PATH', 'restaurant_index.parquet')
+INDEX_MAX_AGE_HOURS = float(os.getenv('INDEX_MAX_AGE_HOURS', 7 * 24))
+INDEX_CRAWL_RADIUS = int(os.getenv('INDEX_CRAWL_RADIUS', 10000))
+INDEX_GRID_DEG = 0.01          # 격자 한 칸 (위도 기준 약 1.1km)
+EARTH_RADIUS_M = 6371000.0
+
+def _haversine_m(lat1, lon1, lat2, lon2):
+    # numpy 배열/스칼라 모두 지원
+    lat1, lon1, lat2, lon2 = map(np.radians, (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(a))
+
+def _index_meta_path(path: str) -> str:
+    return os.path.splitext(path)[0] + '.meta.json'
+
+class RestaurantIndex:
+    """사전 수집된 식당 테이블 + 위경도 격자 버킷"""
+    def __init__(self, df: pd.DataFrame, meta: Dict):
+        # 카테고리는 범주형으로 (parquet 사전 인코딩과 그대로 대응, 검색 결과에도 코드만 복사)
+        self.df = df.reset_index(drop=True).astype({'category': 'category', 'cat_full': 'category'})
+        self.meta = meta
+        self._lat = self.df['lat'].to_numpy(dtype=float)
+        self._lon = self.df['lon'].to_numpy(dtype=float)
+        cells = zip(np.floor(self._lat / INDEX_GRID_DEG).astype(int), np.floor(self._lon / INDEX_GRID_DEG).astype(int))
+        self._grid: Dict[Tuple[int, int], List[int]] = {}
+        for i, cell in enumerate(cells):
+            self._grid.setdefault(cell, []).append(i)
+        self._centers = {c['query']: c for c in meta.get('centers', [])}
+
+    @classmethod
+    def load(cls, path: str = INDEX_PATH) -> Optional['RestaurantIndex']:
+        try:
+            with open(_index_meta_path(path), encoding='utf-8') as f:
+                meta = json.load(f)
+            return cls(pd.read_parquet(path), meta)
+        except (ImportError, OSError, ValueError, KeyError):
+            return None
+
+    def save(self, path: str = INDEX_PATH):
+        self.df.to_parquet(path, index=False)
+        with open(_index_meta_path(path), 'w', encoding='utf-8') as f:
+            json.dump(self.meta, f, ensure_ascii=False)
+
+    def is_stale(self) -> bool:
+        return time.time() - self.meta.get('built_at', 0) > INDEX_MAX_AGE_HOURS * 3600
+
+    def center(self, query: str) -> Optional[Tuple[float, float, str]]:
+        c = self._centers.get(query)
+        return (c['lat'], c['lon'], c['name']) if c else None
+
+    def covers(self, lat: float, lon: float, radius: int) -> bool:
+        # 검색 원이 수집 지점 하나의 완전 수집 반경 안에 들어갈 때만 인덱스로 응답
+        return any(
+            _haversine_m(lat, lon, c['lat'], c['lon']) + radius <= c['coverage']
+            for c in self._centers.values()
+        )
+
+    def query(self, lat: float, lon: float, radius: int) -> 'CandidateTable':
+        dlat = radius / 111320.0
+        dlon = radius / (111320.0 * max(np.cos(np.radians(lat)), 1e-6))
+        r0, r1 = int(np.floor((lat - dlat) / INDEX_GRID_DEG)), int(np.floor((lat + dlat) / INDEX_GRID_DEG))
+        c0, c1 = int(np.floor((lon - dlon) / INDEX_GRID_DEG)), int(np.floor((lon + dlon) / INDEX_GRID_DEG))
+        rows = [i for r in range(r0, r1 + 1) for c in range(c0, c1 + 1) for i in self._grid.get((r, c), [])]
+        if not rows: return CandidateTable.from_places([])
+
+        rows = np.array(rows)
+        dist = _haversine_m(lat, lon, self._lat[rows], self._lon[rows])
+        mask = dist <= radius
+        rows, dist = rows[mask], dist[mask]
+        order = np.argsort(dist, kind='stable')
+
+        hits = self.df.take(rows[order])
+        hits['distance'] = dist[order].astype('int32')
+        return CandidateTable.from_frame(hits)
+
+def build_restaurant_index(kakao=None, blog_counter: Callable[[List[str]], List[Optional[int]]] = None,
+                           path: Optional[str] = INDEX_PATH, radius: int = INDEX_CRAWL_RADIUS) -> RestaurantIndex:
+    """모든 읍/리를 한 번씩 지오코딩 → FD6 전체 수집 → 블로그 수 → 인덱스 파일 저장
+    (kakao / blog_counter 는 녹화·모의 API로 교체 가능, path=None 이면 저장 생략)
+    블로그 수 조회에 실패한 식당은 NaN 으로 남겨 검색 시 실시간 보강 대상이 되게 함"""
+    kakao = kakao or KakaoAPI()
+    blog_counter = blog_counter or (lambda names: fetch_blog_counts(names, lookup=lookup_blog_count))
+
+    rows: Dict[str, Dict] = {}
+    centers = []
+    for eup, ris in CHEORWON_DATA.items():
+        for ri in ris:
+            query = f"강원특별자치도 철원군 {eup} {ri}"
+            coords = kakao.get_coords(query)
+            if not coords: continue
+            lat, lon, name = coords
+            # 결과가 상한에 잘렸으면 빠짐없이 수집된 반경까지만 인덱스로 응답
+            places, coverage = kakao.search_restaurants_with_coverage(lat, lon, radius)
+            centers.append({'query': query, 'name': name, 'lat': lat, 'lon': lon, 'coverage': coverage})
+            for p in places:
+                key = p.get('id') or f"{p['name']}@{p['lat']:.6f},{p['lon']:.6f}"
+                rows.setdefault(key, {k: v for k, v in p.items() if k != 'distance'})
+
+    if not rows:
+        raise RuntimeError("수집된 식당이 없습니다. API 키/네트워크를 확인하세요.")
+
+    df = pd.DataFrame(list(rows.values()))
+    df['blog_count'] = pd.Series(blog_counter(df['name'].tolist()), index=df.index, dtype='float64')
+    index = RestaurantIndex(df, {'built_at': time.time(), 'radius': radius, 'centers': centers})
+    if path:
+        index.save(path)
+    return index
+
+_loaded_indexes: Dict[str, Tuple[float, Optional[RestaurantIndex]]] = {}
+_loaded_indexes_lock = threading.Lock()
+
+def get_restaurant_index(path: str = INDEX_PATH) -> Optional[RestaurantIndex]:
+    # 파일이 갱신되면(mtime 변경) 다시 로드
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        return None
+    with _loaded_indexes_lock:
+        loaded = _loaded_indexes.get(path)
+        if loaded is None or loaded[0] != mtime:
+            loaded = _loaded_indexes[path] = (mtime, RestaurantIndex.load(path))
+        return loaded[1]
+
+def find_restaurants(kakao: KakaoAPI, lat: float, lon: float, radius: int) -> 'CandidateTable':
+    """최신 인덱스가 검색 범위를 덮으면 인덱스에서, 아니면 실시간 카카오 검색
+    (오프라인 실행이면 실시간 검색이 불가능하므로 오래된 인덱스라도 사용)"""
+    index = get_restaurant_index()
+    with span('stage.places', source='index') as sp:
+        if index is not None and (HTTP_OFFLINE or not index.is_stale()) and index.covers(lat, lon, radius):
+            places = index.query(lat, lon, radius)
+        else:
+            sp['source'] = 'live'
+            places = CandidateTable.from_places(kakao.search_restaurants(lat, lon, radius))
+        sp['count'] = len(places)
+    return places
+
+# ============================================================================
+# 🤖 추천 엔진
+# ============================================================================
+class Recommender:
+    BLOG_BONUS = 10  # 블로그 수 가산점 (보강으로 오를 수 있는 점수 상한)
+
+    # 카테고리 키워드 그룹 (get_score / score_frame 공용)
+    KEYWORDS = {
+        'meal': ['한식', '백반', '국밥', '찌개', '면', '죽'],
+        'meat': ['육류', '고기', '회', '곱창', '술집', '족발'],
+        'cafe': ['카페', '제과', '베이커리', '디저트'],
+        'delivery': ['치킨', '피자', '패스트푸드', '중식', '도시락'],
+        'lunch': ['백반', '국수', '분식'],
+        'dinner': ['고기', '회', '요리', '전골'],
+        'rainy': ['전', '칼국수', '짬뽕', '국물'],
+        'solo': ['분식', '국밥', '패스트푸드', '김밥'],
+        'group': ['고기', '회', '한정식'],
+        'gogi': ['고기'],
+    }
+
+    @staticmethod
+    def _context_flags(ctx: Dict) -> Tuple[int, bool, bool]:
+        hour = ctx['dt'].hour
+        is_weekend = (ctx['dt'].weekday() >= 5)
+        is_rain = ('비' in ctx['weather']['desc'] or '흐림' in ctx['weather']['desc'])
+        return hour, is_weekend, is_rain
+
+    @staticmethod
+    def get_score(r: Dict, ctx: Dict, blog_cnt: int, rating: float) -> Tuple[float, List[str]]:
+        score = 50.0
+        reasons = []
+        full_cat = r['cat_full']
+        kw = Recommender.KEYWORDS
+        
+        # 1. 메뉴 타입
+        menu_type = ctx['menu_type']
+        if menu_type == "🍚 든든한 밥 (식사)":
+            if any(k in full_cat for k in kw['meal']): score += 50
+            elif '고기' in full_cat: score -= 20
+        elif menu_type == "🍖 고기/회 (구이/술)":
+            if any(k in full_cat for k in kw['meat']): score += 50
+            else: score -= 10
+        elif menu_type == "☕ 디저트/카페":
+            if any(k in full_cat for k in kw['cafe']): score += 50
+            else: score -= 50
+        elif menu_type == "🛵 배달/포장":
+            if any(k in full_cat for k in kw['delivery']): score += 50; reasons.append("🛵 배달 인기")
+            else: score += 10
+            
+        # 2. 시간/요일
+        hour, is_weekend, is_rain = Recommender._context_flags(ctx)
+        
+        if 11 <= hour < 15 and not is_weekend:
+            if '고기' in full_cat and menu_type != "🍖 고기/회 (구이/술)": score -= 30
+            if any(k in full_cat for k in kw['lunch']): score += 20; reasons.append("☀️ 점심 추천")
+        
+        if hour >= 17 or is_weekend:
+            if any(k in full_cat for k in kw['dinner']): score += 15; reasons.append("🌙 저녁/외식")
+
+        # 3. 날씨
+        if is_rain:
+            if menu_type == "🛵 배달/포장": score += 20; reasons.append("☔ 비올 땐 배달")
+            elif any(k in full_cat for k in kw['rainy']): score += 20; reasons.append("☔ 비오는 날 국룰")
+
+        # 4. 프로필
+        if ctx['group'] == '혼밥':
+            if any(k in full_cat for k in kw['solo']): score += 15; reasons.append("🍱 혼밥 강추")
+            elif '고기' in full_cat: score -= 20
+        if ctx['group'] == '단체' and any(k in full_cat for k in kw['group']): score += 15; reasons.append("👨‍👩‍👧‍👦 단체석 예상")
+
+        # 5. 블로그/평점 가산점
+        if blog_cnt > 50: score += Recommender.BLOG_BONUS
+        if rating >= 4.5: score += 10
+
+        return score, reasons
+
+    @staticmethod
+    def category_masks(cat_full: pd.Series) -> Dict[str, np.ndarray]:
+        """키워드 그룹별 포함 여부를 정규식 한 번으로 계산 (그룹당 불리언 컬럼)"""
+        cat_full = cat_full.fillna('').astype(str)
+        return {
+            name: cat_full.str.contains('|'.join(map(re.escape, kws)), regex=True).to_numpy(dtype=bool)
+            for name, kws in Recommender.KEYWORDS.items()
+        }
+
+    @staticmethod
+    def score_frame(df: pd.DataFrame, ctx: Dict, masks: Optional[Dict[str, np.ndarray]] = None) -> pd.DataFrame:
+        """후보 테이블 전체 일괄 채점 (get_score 와 동일한 점수/사유 순서)
+        df 컬럼: cat_full, blog_count, rating → final_score, reasons 컬럼 반환"""
+        m = masks if masks is not None else Recommender.category_masks(df['cat_full'])
+        n = len(df)
+        score = np.full(n, 50.0)
+        tagged: List[Tuple[np.ndarray, str]] = []  # (해당 행, 사유) - 추가 순서가 곧 사유 순서
+
+        # 1. 메뉴 타입
+        menu_type = ctx['menu_type']
+        if menu_type == "🍚 든든한 밥 (식사)":
+            score += np.where(m['meal'], 50, np.where(m['gogi'], -20, 0))
+        elif menu_type == "🍖 고기/회 (구이/술)":
+            score += np.where(m['meat'], 50, -10)
+        elif menu_type == "☕ 디저트/카페":
+            score += np.where(m['cafe'], 50, -50)
+        elif menu_type == "🛵 배달/포장":
+            score += np.where(m['delivery'], 50, 10)
+            tagged.append((m['delivery'], "🛵 배달 인기"))
+
+        # 2. 시간/요일
+        hour, is_weekend, is_rain = Recommender._context_flags(ctx)
+        if 11 <= hour < 15 and not is_weekend:
+            if menu_type != "🍖 고기/회 (구이/술)": score -= np.where(m['gogi'], 30, 0)
+            score += np.where(m['lunch'], 20, 0)
+            tagged.append((m['lunch'], "☀️ 점심 추천"))
+        if hour >= 17 or is_weekend:
+            score += np.where(m['dinner'], 15, 0)
+            tagged.append((m['dinner'], "🌙 저녁/외식"))
+
+        # 3. 날씨
+        if is_rain:
+            if menu_type == "🛵 배달/포장":
+                score += 20
+                tagged.append((np.ones(n, dtype=bool), "☔ 비올 땐 배달"))
+            else:
+                score += np.where(m['rainy'], 20, 0)
+                tagged.append((m['rainy'], "☔ 비오는 날 국룰"))
+
+        # 4. 프로필
+        if ctx['group'] == '혼밥':
+            score += np.where(m['solo'], 15, np.where(m['gogi'], -20, 0))
+            tagged.append((m['solo'], "🍱 혼밥 강추"))
+        if ctx['group'] == '단체':
+            score += np.where(m['group'], 15, 0)
+            tagged.append((m['group'], "👨‍👩‍👧‍👦 단체석 예상"))
+
+        # 5. 블로그/평점 가산점
+        score += np.where(df['blog_count'].to_numpy() > 50, Recommender.BLOG_BONUS, 0)
+        score += np.where(df['rating'].to_numpy() >= 4.5, 10, 0)
+
+        reasons: List[List[str]] = [[] for _ in range(n)]
+        for mask, label in tagged:
+            for i in np.flatnonzero(mask):
+                reasons[i].append(label)
+
+        return pd.DataFrame({'final_score': score, 'reasons': reasons}, index=df.index)
+
+# ============================================================================
+# 🧮 후보 테이블 (채점/보강/지도/CSV 공용 컬럼 저장소)
+# ============================================================================
+# 컬럼 → 타입 (카테고리는 범주형: 반복되는 문자열을 한 번만 저장하고 행에는 코드만)
+# None 은 pandas 가 추론한 문자열 타입 그대로, blog_count 는 아직 조회 전이면 NaN
+CANDIDATE_DTYPES = {
+    'id': None, 'name': None, 'category': 'category', 'cat_full': 'category',
+    'address': None, 'phone': None, 'distance': 'int32', 'lat': 'float64', 'lon': 'float64',
+    'url': None, 'blog_count': 'float64', 'rating': 'float64',
+}
+
+@functools.lru_cache(maxsize=64)
+def _category_code_masks(categories: Tuple[str, ...]) -> Dict[str, np.ndarray]:
+    """고유 카테고리별 키워드 그룹 포함 여부 (마지막 칸은 카테고리 없음 = 코드 -1)"""
+    masks = Recommender.category_masks(pd.Series(categories, dtype=object))
+    return {name: np.append(m, False) for name, m in masks.items()}
+
+class CandidateTable:
+    """검색 후보 한 벌 (행 = 식당) - 점수/보강 값도 같은 DataFrame 컬럼에 기록
+    카테고리 키워드 매칭은 고유 카테고리당 한 번 계산해 코드로 펼침"""
+    def __init__(self, df: pd.DataFrame, masks: Optional[Dict[str, np.ndarray]] = None):
+        self.df = df
+        self._masks = masks
+
+    @classmethod
+    def from_places(cls, places: List[Dict]) -> 'CandidateTable':
+        return cls.from_frame(pd.DataFrame.from_records(places, columns=list(CANDIDATE_DTYPES)))
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> 'CandidateTable':
+        # 이미 맞는 타입의 컬럼(인덱스의 범주형 등)은 변환 없이 그대로 사용
+        df = df.reindex(columns=list(CANDIDATE_DTYPES))
+        df = df.astype({col: dtype for col, dtype in CANDIDATE_DTYPES.items() if dtype is not None})
+        return cls(df.reset_index(drop=True))
+
+    def __len__(self) -> int:
+        return len(self.df)
+
+    @property
+    def masks(self) -> Dict[str, np.ndarray]:
+        """행별 키워드 그룹 포함 여부 (Recommender.score_frame 의 masks 인자)"""
+        if self._masks is None:
+            cat = self.df['cat_full'].cat
+            codes = cat.codes.to_numpy()
+            self._masks = {name: m[codes] for name, m in _category_code_masks(tuple(cat.categories)).items()}
+        return self._masks
+
+    def take(self, rows: np.ndarray) -> 'CandidateTable':
+        """일부 행만 (상위 추천 등) - 계산해 둔 마스크도 같이 잘라 넘김"""
+        masks = {name: m[rows] for name, m in self._masks.items()} if self._masks is not None else None
+        return CandidateTable(self.df.take(rows).reset_index(drop=True), masks)
+
+    def records(self, columns: Optional[List[str]] = None) -> List[Dict]:
+        """행별 dict (카드/JSON 응답용, 빈 값은 None, 블로그 수는 int)"""
+        df = self.df if columns is None else self.df[[c for c in columns if c in self.df]]
+        rows = df.astype(object).where(df.notna(), None).to_dict('records')
+        if 'blog_count' in df:
+            for r in rows:
+                if r['blog_count'] is not None: r['blog_count'] = int(r['blog_count'])
+        return rows
+
+# ============================================================================
+# 🔄 검색 파이프라인 (단계별 결과 스트리밍)
+# ============================================================================
+TOP_K = 6
+DEFAULT_CENTER = (38.1467, 127.3136)
+STAGE_RENDER_INTERVAL = 0.3  # 보강 중간 결과 갱신 최소 간격 (초)
+LOW_BUDGET_ENRICH_TOP_N = int(os.getenv('LOW_BUDGET_ENRICH_TOP_N', 12))
+ENRICH_ROUND_SIZE = int(os.getenv('ENRICH_ROUND_SIZE', ENRICH_MAX_WORKERS))  # 한 번에 보강할 후보 수
+
+def rank_places(table: CandidateTable, ctx: Dict, top_k: int = TOP_K) -> Tuple[np.ndarray, CandidateTable]:
+    """블로그 수가 아직 없는 후보는 0으로 보고 채점 → (양수 점수 행 번호 순위순, 상위 top_k 테이블)
+    (모든 행에 final_score/reasons 기록 - 블로그 수가 없으면 점수 하한)"""
+    with span('stage.score', candidates=len(table)):
+        result = Recommender.score_frame(table.df, ctx, masks=table.masks)
+        score = result['final_score'].to_numpy()
+        table.df['final_score'] = score
+        table.df['reasons'] = result['reasons'].to_numpy()
+        order = np.flatnonzero(score > 0)
+        order = order[np.argsort(-score[order], kind='stable')]
+    return order, table.take(order[:top_k])
+
+def count_candidates(table: CandidateTable) -> Tuple[int, bool]:
+    """'N개 후보' 로 보여 줄 (수, 정확한지) - rank_places 이후 호출
+    블로그 수 미조회 후보 중 가산점을 받아야 양수가 되는 곳은 조회 전엔 알 수 없으므로
+    포함해서 세고 추정치(최대값)로 표시 (그런 후보가 없으면 전체 보강과 같은 정확한 수)"""
+    score = table.df['final_score'].to_numpy()
+    undecided = table.df['blog_count'].isna().to_numpy() & (score <= 0) & (score + Recommender.BLOG_BONUS > 0)
+    return int(np.count_nonzero(score > 0) + np.count_nonzero(undecided)), not undecided.any()
+
+def _enrich_targets(table: CandidateTable, order: np.ndarray, top_k: int = TOP_K, limit: Optional[int] = None) -> List[int]:
+    """블로그 수를 받으면 상위 top_k 에 들 수 있는 후보만 (점수 상한이 높은 순)
+    상한(하한 + BLOG_BONUS)이 현재 k번째 점수보다 낮거나 0 이하인 후보는
+    전부 조회해도 순위가 바뀌지 않으므로 생략 → 최종 상위 top_k 는 전체 보강과 동일"""
+    score = table.df['final_score'].to_numpy()
+    threshold = score[order[top_k - 1]] if len(order) >= top_k else 0.0
+    upper = score + Recommender.BLOG_BONUS
+    todo = np.flatnonzero(table.df['blog_count'].isna().to_numpy() & (upper > 0) & (upper >= threshold))
+    todo = todo[np.argsort(-score[todo], kind='stable')]
+    return todo[:limit].tolist()
+
+def _limit_enrichment(table: CandidateTable, order: np.ndarray, missing: List[int], keep: int, budget_mode: str) -> List[int]:
+    """네이버 예산이 부족할 때: 캐시(만료 포함)에 남은 블로그 수를 쓰고,
+    새 조회는 잠정 순위 상위 keep 곳만 (예산 부족 시 LOW_BUDGET_ENRICH_TOP_N, 소진 시 0곳)"""
+    with span('stage.budget_degrade', mode=budget_mode) as sp:
+        blog_count = table.df['blog_count'].to_numpy(copy=True)
+        names = table.df['name'].to_numpy()
+        for i in missing:
+            cnt = peek_blog_count(names[i])
+            blog_count[i] = np.nan if cnt is None else cnt
+        rank = np.full(len(table), len(table))
+        rank[order] = np.arange(len(order))
+        todo = sorted((i for i in missing if np.isnan(blog_count[i])), key=lambda i: rank[i])
+        blog_count[todo[keep:]] = 0  # 조회 생략
+        table.df['blog_count'] = blog_count
+        sp['skipped'] = len(todo[keep:])
+        return todo[:keep]
+
+def enrich_for_contexts(table: CandidateTable, ctxs: List[Dict], top_k: int = TOP_K) -> int:
+    """한 장소의 후보로 여러 조건을 채점할 때: 조건별로 상위 top_k 에 들 수 있는 후보의
+    합집합만 한 번에 보강 (이후 조건별 rank_places 결과는 전체 보강과 동일) → 조회 수"""
+    targets = set()
+    for ctx in ctxs:
+        order, _ = rank_places(table, ctx, top_k)
+        targets.update(_enrich_targets(table, order, top_k))
+    targets = sorted(targets)
+    blog_col = table.df.columns.get_loc('blog_count')
+    names = table.df['name'].to_numpy()
+    with span('stage.enrich', candidates=len(targets), contexts=len(ctxs)):
+        for j, cnt in iter_blog_counts([names[i] for i in targets]):
+            table.df.iat[targets[j], blog_col] = cnt
+    return len(targets)
+
+def resolve_location(kakao: KakaoAPI, full_addr: str, fallback_name: str) -> Dict:
+    """좌표 & 행정구역 (인덱스 수집 지점 → 카카오 지오코딩 → 못 찾으면 기본 중심)"""
+    with span('stage.geocode'):
+        index = get_restaurant_index()
+        coords = (index.center(full_addr) if index is not None else None) or kakao.get_coords(full_addr)
+    fallback = not coords
+    if fallback:
+        coords = (*DEFAULT_CENTER, fallback_name)
+    lat, lon, center_name = coords
+
+    with span('stage.region'):
+        reg_info = kakao.kakao_rest_api(lon, lat)
+    reg_name = reg_info['documents'][0]['address_name'] if reg_info and reg_info['documents'] else ""
+    return {'lat': lat, 'lon': lon, 'center_name': center_name, 'reg_name': reg_name, 'fallback': fallback}
+
+def search_stages(kakao: KakaoAPI, full_addr: str, fallback_name: str, radius_m: int, ctx: Dict) -> Iterator[Tuple[str, Dict]]:
+    """검색을 단계별로 yield
+    location → provisional(블로그 수 없이 거리+카테고리) → enriched(수집 중 갱신) → final / empty
+    provisional/enriched/final 데이터: table(전체 후보), scored(양수 점수 행 번호, 순위순), top_picks(상위 테이블)
+    provisional/enriched 의 done/total: 보강(블로그 수 조회) 대상 중 완료 수 / 전체 수"""
+    # 1. 좌표 & 행정구역
+    location = resolve_location(kakao, full_addr, fallback_name)
+    yield 'location', location
+
+    # 2. 식당 검색
+    table = find_restaurants(kakao, location['lat'], location['lon'], radius_m)
+    if not len(table):
+        yield 'empty', {}
+        return
+
+    # 3. 잠정 순위 (인덱스에 저장된 블로그 수만 반영)
+    names = table.df['name'].to_numpy()
+    table.df['rating'] = [get_naver_rating(name) for name in names]
+    scored, top_picks = rank_places(table, ctx)
+
+    # 4. 보강 대상 - 상위권에 들 수 있는 후보만 (예산이 부족하면 캐시 값으로 채우고 일부만)
+    missing = _enrich_targets(table, scored)
+    missing_total = int(table.df['blog_count'].isna().sum())
+    quota = get_quota('naver')
+    budget_mode, remaining = quota.mode(), quota.budget.remaining()
+    if missing and (budget_mode != 'ok' or len(missing) > remaining):
+        keep = min(remaining, LOW_BUDGET_ENRICH_TOP_N if budget_mode == 'low' else len(missing))
+        missing = _limit_enrichment(table, scored, missing, keep, budget_mode)
+        scored, top_picks = rank_places(table, ctx)  # 캐시(만료 포함)에서 채운 값/생략(0) 반영
+    total = len(missing)  # 진행률 분모 (provisional/enriched 공통)
+    yield 'provisional', {'table': table, 'scored': scored, 'top_picks': top_picks, 'done': 0, 'total': total}
+
+    # 5. 블로그 수 보강 - 점수 상한이 높은 순으로 나눠 조회
+    # (한 묶음이 끝날 때마다 k번째 점수가 오르므로 남은 후보를 다시 걸러냄)
+    # (소비자가 화면을 그리는 동안 멈춰 있던 시간은 enrich 구간에서 제외)
+    blog_col = table.df.columns.get_loc('blog_count')
+    started = last = time.monotonic()
+    paused = 0.0
+    done = rounds = 0
+    while True:
+        batch = _enrich_targets(table, scored, limit=ENRICH_ROUND_SIZE)
+        if not batch: break
+        rounds += 1
+        for j, cnt in iter_blog_counts([names[i] for i in batch]):
+            table.df.iat[batch[j], blog_col] = cnt
+            done += 1
+            if done < total and time.monotonic() - last >= STAGE_RENDER_INTERVAL:
+                scored, top_picks = rank_places(table, ctx)
+                t = time.monotonic()
+                yield 'enriched', {'table': table, 'scored': scored, 'top_picks': top_picks, 'done': done, 'total': total}
+                last = time.monotonic()
+                paused += last - t
+        scored, top_picks = rank_places(table, ctx)
+    record_span('stage.enrich', time.monotonic() - started - paused, candidates=done,
+                skipped=missing_total - done, rounds=rounds)
+
+    yield 'final', {'table': table, 'scored': scored, 'top_picks': top_picks}
+
+# ============================================================================
+# 💾 검색 결과 저장소 (사용자/세션 간 공유)
+# ============================================================================
+RESULT_TTL = int(os.getenv('RESULT_TTL', 15 * 60))
+RESULT_STORE_MAX_BYTES = int(os.getenv('RESULT_STORE_MAX_BYTES', 16 * 1024 * 1024))
+
+def make_search_key(full_addr: str, radius: float, menu_type: str, group: str, dt: datetime, weather: Dict) -> List:
+    # 점수에 영향을 주는 조건만 사용 (시간은 시 단위 버킷, 날씨는 비 여부만)
+    _, _, is_rain = Recommender._context_flags({'dt': dt, 'weather': weather})
+    return [" ".join(full_addr.split()), round(float(radius), 1), menu_type, group, dt.strftime('%Y-%m-%d %H'), is_rain]
+
+@process_cached
+def get_result_store() -> ResponseCache:
+    """같은 조건의 검색을 모든 사용자가 재사용 (TTL + 용량 기반 LRU)"""
+    return ResponseCache(MemoryCacheBackend(RESULT_STORE_MAX_BYTES), {'results': RESULT_TTL})
+
+# ============================================================================
+# 🧭 엔진 진입점 (컨텍스트 → 순위 결과)
+# ============================================================================
+def estimate_weather(dt: datetime) -> Dict:
+    # 그 시간에 맞는 날씨 (가상)
+    sel_month = dt.month
+    if sel_month in [6, 7]: sel_w, sel_t = "비/흐림 🌧️", random.randint(22, 28)
+    elif sel_month in [12, 1, 2]: sel_w, sel_t = "눈/추움 ☃️", random.randint(-10, 0)
+    else: sel_w, sel_t = "쾌적 🍃", random.randint(12, 22)
+    return {'desc': sel_w, 'temp': sel_t}
+
+def build_full_addr(eup: str, ri: str, detail: str = "") -> str:
+    return f"강원특별자치도 철원군 {eup} {ri} {detail}".strip()
+
+def run_search(kakao: KakaoAPI, full_addr: str, fallback_name: str, radius_m: int, ctx: Dict,
+               on_stage: Optional[Callable[[str, Dict], None]] = None) -> Dict:
+    """search_stages 를 끝까지 실행해 결과 레코드로 정리 (on_stage 로 중간 단계 전달)"""
+    record = {'location': None, 'scored_count': 0, 'scored_count_exact': True,
+              'top_picks': CandidateTable.from_places([]), 'empty': False}
+    for stage, data in search_stages(kakao, full_addr, fallback_name, radius_m, ctx):
+        if on_stage is not None:
+            on_stage(stage, data)
+        if stage == 'location':
+            record['location'] = data
+        elif stage == 'empty':
+            record['empty'] = True
+        elif stage == 'final':
+            record['scored_count'], record['scored_count_exact'] = count_candidates(data['table'])
+            record['top_picks'] = data['top_picks']
+    record['cached_at'] = time.time()
+    return record
+
+def recommend(query: Dict, kakao: Optional[KakaoAPI] = None, use_store: bool = True) -> Dict:
+    """검색 조건 하나 → 결과 레코드 (location, scored_count(+_exact), top_picks(CandidateTable), empty, cached_at)
+    query: eup, ri, detail, radius_km, menu_type, group, dt(datetime 또는 ISO 문자열), weather, age, gender
+    잘못된 조건은 ValueError"""
+    eup, ri = query.get('eup'), query.get('ri')
+    if not isinstance(eup, str) or eup not in CHEORWON_DATA or ri not in CHEORWON_DATA[eup]:
+        raise ValueError(f"알 수 없는 읍/면·리: {eup} {ri}")
+    menu_type = query.get('menu_type', MENU_TYPES[0])
+    if menu_type not in MENU_TYPES:
+        raise ValueError(f"menu_type 은 {MENU_TYPES} 중 하나여야 합니다.")
+    group = query.get('group', GROUPS[1])
+    if group not in GROUPS:
+        raise ValueError(f"group 은 {GROUPS} 중 하나여야 합니다.")
+    try:
+        radius_km = float(query.get('radius_km', 3.0))
+    except TypeError:  # null, 목록 등
+        radius_km = float('nan')
+    if not RADIUS_RANGE_KM[0] <= radius_km <= RADIUS_RANGE_KM[1]:
+        raise ValueError(f"radius_km 은 {RADIUS_RANGE_KM[0]}~{RADIUS_RANGE_KM[1]} 사이여야 합니다.")
+    dt = query.get('dt') or datetime.now()
+    if isinstance(dt, str):
+        dt = datetime.fromisoformat(dt)
+    if not isinstance(dt, datetime):
+        raise ValueError("dt 는 datetime 또는 ISO 형식 문자열이어야 합니다.")
+    weather = query.get('weather') or estimate_weather(dt)
+    if not isinstance(weather, dict) or not isinstance(weather.get('desc'), str):
+        raise ValueError("weather 는 desc(문자열)를 가진 객체여야 합니다.")
+
+    detail = query.get('detail') or ""
+    if not isinstance(detail, str):
+        raise ValueError("detail 은 문자열이어야 합니다.")
+    full_addr = build_full_addr(eup, ri, detail)
+    search_key = make_search_key(full_addr, radius_km, menu_type, group, dt, weather)
+    track_search(eup, ri, detail, radius_km, menu_type, group)
+    if use_store:
+        record = get_result_store().get('results', search_key)
+        if record is not None:
+            return record
+
+    ctx = {
+        'menu_type': menu_type, 'dt': dt, 'weather': weather,
+        'age': query.get('age'), 'gender': query.get('gender'), 'group': group
+    }
+    record = run_search(kakao or KakaoAPI(), full_addr, f"{eup} 중심", int(radius_km * 1000), ctx)
+    if use_store and record['top_picks']:
+        get_result_store().set('results', search_key, record)
+    return record
+
+# ============================================================================
+# ♨️ 백그라운드 예열 (인기 검색 결과를 미리 계산)
+# ============================================================================
+WARM_INTERVAL = int(os.getenv('WARM_INTERVAL', 300))  # 예열 주기 (초, 0이면 끔)
+WARM_TOP_N = int(os.getenv('WARM_TOP_N', 12))         # 시간 버킷당 예열할 검색 조건 수
+WARM_DECAY = 0.9                                      # 주기마다 인기도 감쇠 (지난 관심은 점점 제외)
+WARM_RADII_KM = tuple(float(r) for r in os.getenv('WARM_RADII_KM', '3.0').split(','))
+WARM_SNAPSHOT_PATH = os.getenv('WARM_SNAPSHOT_PATH', 'warm_snapshot.pkl')
+WARM_SNAPSHOT_NAMESPACES = REFRESH_AHEAD_NAMESPACES + ('blog_count',)  # 스냅샷에 담을 응답 캐시
+WARM_SNAPSHOT_VERSION = 2  # 결과 레코드 형식이 바뀌면 올림 (이전 스냅샷의 결과는 버림)
+# 식사 시간대별 기본 예열 메뉴 ([시작 시, 끝 시) → 메뉴) - 인기 기록이 없는 재시작 직후에 사용
+WARM_MEAL_MENUS = {
+    (11, 14): (MENU_TYPES[0],),
+    (17, 21): (MENU_TYPES[1], MENU_TYPES[0]),
+}
+
+warm_logger = logging.getLogger('cheorwon.warm')
+
+class SearchPopularity:
+    """검색 조건 (eup, ri, detail, radius_km, menu_type, group) 별 인기도 - 시간 버킷 제외"""
+    def __init__(self):
+        self._counts: Dict[Tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def add(self, cond: Tuple, weight: float = 1.0):
+        with self._lock:
+            self._counts[cond] = self._counts.get(cond, 0.0) + weight
+
+    def top(self, n: int) -> List[Tuple]:
+        with self._lock:
+            return [c for c, _ in sorted(self._counts.items(), key=lambda kv: kv[1], reverse=True)[:n]]
+
+    def decay(self, factor: float, floor: float = 0.05):
+        with self._lock:
+            self._counts = {c: v * factor for c, v in self._counts.items() if v * factor >= floor}
+
+    def items(self) -> List[Tuple[Tuple, float]]:
+        with self._lock:
+            return list(self._counts.items())
+
+@process_cached
+def get_search_popularity() -> SearchPopularity:
+    return SearchPopularity()
+
+def track_search(eup: str, ri: str, detail: str, radius_km: float, menu_type: str, group: str):
+    """사용자 검색 1회 기록 (결과 저장소 적중 포함)"""
+    get_search_popularity().add((eup, ri, detail.strip(), round(float(radius_km), 1), menu_type, group))
+
+class Warmer:
+    """인기 검색 + 식사 시간대 기본 조건의 결과를 만료 전에 미리 계산해 결과 저장소에 채움
+    (장소/좌표 캐시는 ResponseCache 의 만료 전 갱신이 맡고, 여기서는 그 캐시를 거쳐 검색)"""
+    def __init__(self, kakao: Optional[KakaoAPI] = None, popularity: Optional[SearchPopularity] = None,
+                 snapshot_path: Optional[str] = WARM_SNAPSHOT_PATH):
+        self.kakao = kakao or KakaoAPI()
+        self.popularity = popularity or get_search_popularity()
+        self.snapshot_path = snapshot_path
+        self._stop = threading.Event()
+
+    def targets(self, now: datetime) -> List[Tuple[Tuple, datetime]]:
+        """(검색 조건, 기준 시각) - 다음 정시가 한 주기 안에 오면 다음 시간 버킷도 포함"""
+        next_hour = now.replace(minute=0, second=0, microsecond=0) + timedelta(hours=1)
+        hours = [now] + ([next_hour] if (next_hour - now).total_seconds() <= WARM_INTERVAL else [])
+        popular = self.popularity.top(WARM_TOP_N)
+        out = []
+        for dt in hours:
+            conds = list(popular)
+            for (start, end), menus in WARM_MEAL_MENUS.items():
+                if not start <= dt.hour < end: continue
+                for menu_type in menus:
+                    for radius_km in WARM_RADII_KM:
+                        # 읍/면마다 사이드바 기본값(첫 번째 리, 2~4인)
+                        conds += [(eup, ris[0], "", radius_km, menu_type, GROUPS[1]) for eup, ris in CHEORWON_DATA.items()]
+            out += [(c, dt) for c in list(dict.fromkeys(conds))[:WARM_TOP_N]]
+        return out
+
+    def run_once(self, now: Optional[datetime] = None) -> Dict[str, int]:
+        """한 주기: 만료가 가까운(또는 없는) 결과만 다시 계산 → 인기도 감쇠 → 스냅샷 저장"""
+        now = now or datetime.now()
+        stats = {'warmed': 0, 'fresh': 0, 'empty': 0}
+        with span('warm.cycle') as sp:
+            # 예산이 빠듯하면 사용자 요청에 양보
+            if any(get_quota(api).mode() != 'ok' for api in ('kakao', 'naver')):
+                sp['skipped'] = 'quota'
+                return stats
+            store = get_result_store()
+            for (eup, ri, detail, radius_km, menu_type, group), dt in self.targets(now):
+                if self._stop.is_set(): break
+                full_addr = build_full_addr(eup, ri, detail)
+                weather = estimate_weather(dt)
+                search_key = make_search_key(full_addr, radius_km, menu_type, group, dt, weather)
+                left = store.ttl_left('results', search_key)
+                if left is not None and left > WARM_INTERVAL:
+                    stats['fresh'] += 1
+                    continue
+                ctx = {'menu_type': menu_type, 'dt': dt, 'weather': weather,
+                       'age': None, 'gender': None, 'group': group}
+                record = run_search(self.kakao, full_addr, f"{eup} 중심", int(radius_km * 1000), ctx)
+                if record['top_picks']:
+                    store.set('results', search_key, record)
+                    stats['warmed'] += 1
+                else:
+                    stats['empty'] += 1
+            sp.update(stats)
+        self.popularity.decay(WARM_DECAY)
+        self.save_snapshot()
+        return stats
+
+    def save_snapshot(self):
+        """인기도 + 좌표/행정구역/장소/블로그 수 캐시 + 결과 저장소를 디스크에 (임시 파일 → 교체)"""
+        if not self.snapshot_path: return
+        snapshot = {
+            'version': WARM_SNAPSHOT_VERSION,
+            'saved_at': time.time(),
+            'popular': self.popularity.items(),
+            'cache': get_response_cache().export(WARM_SNAPSHOT_NAMESPACES),
+            'results': get_result_store().export(('results',)),
+        }
+        tmp = f"{self.snapshot_path}.{os.getpid()}.tmp"  # 워커 프로세스별 임시 파일
+        with open(tmp, 'wb') as f:
+            pickle.dump(snapshot, f)
+        os.replace(tmp, self.snapshot_path)
+
+    def load_snapshot(self) -> bool:
+        """재시작 직후 마지막 스냅샷으로 캐시/결과/인기도를 채움
+        (만료된 캐시 항목은 stale 로 바로 쓰면서 백그라운드 갱신)"""
+        if not self.snapshot_path or not os.path.exists(self.snapshot_path): return False
+        try:
+            with open(self.snapshot_path, 'rb') as f:
+                snapshot = pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError) as e:
+            warm_logger.warning("warm snapshot unreadable (%s): %s", self.snapshot_path, e)
+            return False
+        with span('warm.restore') as sp:
+            for cond, count in snapshot.get('popular', []):
+                self.popularity.add(cond, count)
+            sp['cache'] = get_response_cache().restore(snapshot.get('cache', []))
+            now = time.time()
+            results = snapshot.get('results', []) if snapshot.get('version') == WARM_SNAPSHOT_VERSION else []
+            sp['results'] = get_result_store().restore([e for e in results if e[1] > now])
+        return True
+
+    def _loop(self):
+        while True:
+            try:
+                self.run_once()
+            except Exception:
+                warm_logger.exception("warm cycle failed")
+            if self._stop.wait(WARM_INTERVAL): return
+
+    def start(self):
+        threading.Thread(target=self._loop, name='cache-warmer', daemon=True).start()
+
+    def stop(self):
+        self._stop.set()
+
+@process_cached
+def start_warmer() -> Warmer:
+    """프로세스당 한 번: 스냅샷으로 캐시를 채우고 예열 스레드를 데몬으로 실행"""
+    warmer = Warmer()
+    warmer.load_snapshot()
+    warmer.start()
+    return warmer
+
+if __name__ == "__main__":
+    if '--build-index' in sys.argv:
+        built = build_restaurant_index()
+        print(f"✅ 인덱스 저장: {INDEX_PATH} (식당 {len(built.df)}곳, 수집 지점 {len(built.meta['centers'])}곳)")
+    elif '--warm' in sys.argv:
+        # 배포 직후 한 번: 스냅샷 복원 + 예열 1주기 + 스냅샷 저장
+        warmer = Warmer()
+        warmer.load_snapshot()
+        print(f"✅ 예열 완료: {warmer.run_once()} → {WARM_SNAPSHOT_PATH}")
+    else:
+        print(__doc__)
@@ -0,0 +1,48 @@
+"""Recommender.score_frame (일괄 채점) ↔ get_score (행 단위 원본) 점수/사유 일치 검사
+
+    python -m pytest -q tests/
+"""
+import itertools
+import os
+import sys
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from engine import GROUPS, MENU_TYPES, CandidateTable, Recommender  # noqa: E402
+
+CATEGORIES = [
+    '음식점 > 한식 > 국밥', '음식점 > 한식 > 육류,고기', '음식점 > 한식 > 칼국수', '음식점 > 한식 > 전골',
+    '음식점 > 한정식', '음식점 > 일식 > 회', '음식점 > 중식', '음식점 > 양식 > 피자', '음식점 > 분식 > 김밥',
+    '음식점 > 치킨', '음식점 > 패스트푸드', '음식점 > 술집', '음식점 > 카페', '음식점 > 간식 > 제과,베이커리', '',
+]
+BLOG_COUNTS = [0, 50, 51, 300, np.nan]   # NaN: 아직 보강 전
+RATINGS = [3.0, 4.49, 4.5, 5.0]
+WEATHERS = ["비/흐림 🌧️", "쾌적 🍃"]      # 점수에는 비 여부만 반영
+DAYS = [datetime(2024, 1, d) for d in range(1, 8)]  # 월~일
+
+
+@pytest.fixture(scope='module')
+def candidates():
+    # 카테고리마다 블로그 수 경계값을 모두, 평점은 돌아가며 배정
+    rows = [{'cat_full': c, 'blog_count': b, 'rating': RATINGS[(i + j) % len(RATINGS)]}
+            for i, c in enumerate(CATEGORIES) for j, b in enumerate(BLOG_COUNTS)]
+    df = pd.DataFrame(rows)
+    return rows, df, CandidateTable.from_frame(df.assign(distance=0))
+
+
+@pytest.mark.parametrize('menu_type,group', list(itertools.product(MENU_TYPES, GROUPS)))
+def test_score_frame_matches_get_score(candidates, menu_type, group):
+    rows, df, table = candidates
+    for day, hour, weather in itertools.product(DAYS, range(24), WEATHERS):
+        ctx = {'menu_type': menu_type, 'group': group, 'dt': day.replace(hour=hour), 'weather': {'desc': weather}}
+        expected = [Recommender.get_score(r, ctx, r['blog_count'], r['rating']) for r in rows]
+        for res in (Recommender.score_frame(df, ctx),
+                    Recommender.score_frame(table.df, ctx, table.masks)):  # 검색 경로 (범주형 코드 마스크)
+            got = list(zip(res['final_score'].tolist(), res['reasons'].tolist()))
+            for r, e, g in zip(rows, expected, got):
+                assert g == e, (ctx, r)
+
@@ -0,0 +1,170 @@
+"""search_stages 보강 단계 검사 (네트워크 없이 위치/식당/블로그 수/예산을 고정값으로 대체)
+
+    python -m pytest -q tests/
+"""
+import os
+import sys
+from datetime import datetime
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import engine  # noqa: E402
+from engine import CandidateTable, rank_places  # noqa: E402
+
+CTX = {'menu_type': "🍚 든든한 밥 (식사)", 'group': "2~4인", 'dt': datetime(2024, 5, 15, 12),
+       'weather': {'desc': "쾌적 🍃"}, 'age': None, 'gender': None}
+CATEGORIES = ['음식점 > 한식 > 국밥', '음식점 > 한식 > 육류,고기', '음식점 > 카페', '음식점 > 중식', '음식점 > 분식 > 김밥']
+
+
+def make_places(n: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    return [{'id': str(i), 'name': f"식당{i}", 'category': c.split(' > ')[-1], 'cat_full': c,
+             'distance': int(rng.integers(0, 3000)), 'lat': 38.1, 'lon': 127.3}
+            for i, c in enumerate(rng.choice(CATEGORIES, n))]
+
+
+def rating_of(name: str) -> float:
+    return (3.0, 4.0, 4.5, 5.0)[int(name[2:]) % 4]
+
+
+def run_stages(monkeypatch, places, blog_counts, budget_mode='ok', remaining=10 ** 6, cached=None, ctx=CTX):
+    """search_stages 를 끝까지 실행 → (단계 목록, 실제 조회한 식당 이름)"""
+    monkeypatch.setattr(engine, 'resolve_location', lambda *a: {
+        'lat': 38.1, 'lon': 127.3, 'center_name': '', 'reg_name': '', 'fallback': False})
+    monkeypatch.setattr(engine, 'find_restaurants', lambda *a: CandidateTable.from_places(places))
+    monkeypatch.setattr(engine, 'get_naver_rating', rating_of)
+    monkeypatch.setattr(engine, 'get_quota', lambda api: SimpleNamespace(
+        mode=lambda: budget_mode, budget=SimpleNamespace(remaining=lambda: remaining)))
+    monkeypatch.setattr(engine, 'peek_blog_count', lambda name: (cached or {}).get(name))
+    fetched = []
+
+    def fake_iter_blog_counts(names, *args, **kwargs):
+        for i, name in enumerate(names):
+            fetched.append(name)
+            yield i, blog_counts[name]
+
+    monkeypatch.setattr(engine, 'iter_blog_counts', fake_iter_blog_counts)
+    return list(engine.search_stages(None, '주소', '중심', 3000, ctx)), fetched
+
+
+def candidate_table(places, blog_counts=None) -> CandidateTable:
+    table = CandidateTable.from_places(places)
+    table.df['rating'] = [rating_of(name) for name in table.df['name']]
+    if blog_counts is not None:
+        table.df['blog_count'] = [blog_counts[name] for name in table.df['name']]
+    return table
+
+
+def ranked_with(places, blog_counts, ctx=CTX):
+    """블로그 수를 모두 채운 테이블로 채점한 (순위, 상위 테이블)"""
+    return rank_places(candidate_table(places, blog_counts), ctx)
+
+
+def assert_same_picks(top_picks: CandidateTable, expected: CandidateTable):
+    assert top_picks.df['name'].tolist() == expected.df['name'].tolist()
+    assert top_picks.df['final_score'].tolist() == expected.df['final_score'].tolist()
+
+
+@pytest.mark.parametrize('budget_mode,remaining', [('exhausted', 0), ('low', 3)])
+def test_degraded_budget_reranks_with_cached_counts(monkeypatch, budget_mode, remaining):
+    places = make_places(40)
+    names = [p['name'] for p in places]
+    cached = {name: 300 for name in names[::3]}            # 만료됐어도 캐시에 남은 블로그 수
+    blog_counts = {name: 120 for name in names}
+    stages, fetched = run_stages(monkeypatch, places, blog_counts, budget_mode, remaining, cached)
+
+    assert len(fetched) <= remaining
+    final = stages[-1][1]
+    assert stages[-1][0] == 'final'
+    # 캐시 값은 그대로, 새로 조회한 곳은 조회 값, 생략한 곳은 0 으로 채점한 결과와 같아야 함
+    expected_counts = {name: cached.get(name, blog_counts[name] if name in fetched else 0) for name in names}
+    _, expected = ranked_with(places, expected_counts)
+    assert_same_picks(final['top_picks'], expected)
+    assert not final['top_picks'].df['blog_count'].isna().any()
+
+
+def test_progress_total_is_enrichment_target_count(monkeypatch):
+    monkeypatch.setattr(engine, 'STAGE_RENDER_INTERVAL', 0)  # 조회 하나마다 enriched
+    places = make_places(60)
+    blog_counts = {p['name']: 120 for p in places}
+    stages, fetched = run_stages(monkeypatch, places, blog_counts)
+
+    progress = [data for stage, data in stages if stage in ('provisional', 'enriched')]
+    assert len(progress) > 1
+    assert {data['total'] for data in progress} == {progress[0]['total']}
+    assert len(fetched) <= progress[0]['total'] < len(places)
+    assert all(data['done'] <= data['total'] for data in progress)
+
+
+@pytest.mark.parametrize('menu_type', engine.MENU_TYPES)
+def test_candidate_count_is_exact_or_marked_as_estimate(monkeypatch, menu_type):
+    # 디저트/카페는 카페가 아닌 곳이 0점 근처라 블로그 수에 따라 양수 여부가 갈림
+    ctx = {**CTX, 'menu_type': menu_type, 'group': "혼밥"}
+    for seed in range(5):
+        places = make_places(60, seed)
+        rng = np.random.default_rng(1000 + seed)  # 카테고리와 다른 난수열
+        blog_counts = {p['name']: int(rng.choice([0, 30, 51, 400])) for p in places}
+        stages, _ = run_stages(monkeypatch, places, blog_counts, ctx=ctx)
+
+        count, exact = engine.count_candidates(stages[-1][1]['table'])
+        full_order, _ = ranked_with(places, blog_counts, ctx)
+        if exact:
+            assert count == len(full_order)
+        else:
+            assert count >= len(full_order)
+
+
+def enrich_in_rounds(table: CandidateTable, ctx, blog_counts, round_size: int):
+    """search_stages 와 같은 방식: 상위 top_k 에 들 수 있는 후보만 round_size 개씩 조회하며 재채점"""
+    blog_col = table.df.columns.get_loc('blog_count')
+    order, top_picks = rank_places(table, ctx)
+    fetched = 0
+    while True:
+        batch = engine._enrich_targets(table, order, limit=round_size)
+        if not batch: break
+        for i in batch:
+            table.df.iat[i, blog_col] = blog_counts[table.df['name'].iat[i]]
+        fetched += len(batch)
+        order, top_picks = rank_places(table, ctx)
+    return top_picks, fetched
+
+
+@pytest.mark.parametrize('menu_type', engine.MENU_TYPES)
+@pytest.mark.parametrize('group', engine.GROUPS)
+def test_two_stage_top_k_matches_full_enrichment(menu_type, group):
+    ctx = {**CTX, 'menu_type': menu_type, 'group': group}
+    tied = skipped = 0
+    for seed in range(8):
+        places = make_places(50, seed)
+        rng = np.random.default_rng(1000 + seed)
+        blog_counts = {p['name']: int(rng.choice([0, 51])) for p in places}
+        full = candidate_table(places, blog_counts)
+        order, expected = rank_places(full, ctx)
+        # k번째 점수와 같은 점수가 상위 밖에도 있는 경우 (동점은 행 순서로 갈림)
+        ranked = full.df['final_score'].to_numpy()[order]
+        tied += len(ranked) > engine.TOP_K and ranked[engine.TOP_K] == ranked[engine.TOP_K - 1]
+        for round_size in (1, 4, 16):
+            top_picks, fetched = enrich_in_rounds(candidate_table(places), ctx, blog_counts, round_size)
+            assert_same_picks(top_picks, expected)
+            skipped += len(places) - fetched
+    assert tied and skipped  # 동점 경계와 조회 생략이 실제로 검사됐는지
+
+
+def test_enrich_for_contexts_matches_full_enrichment(monkeypatch):
+    # 배치 리포트 경로: 모든 조건의 상위권 후보 합집합만 한 번에 보강
+    ctxs = [{**CTX, 'menu_type': m, 'group': g, 'dt': CTX['dt'].replace(hour=h)}
+            for m in engine.MENU_TYPES for g in engine.GROUPS for h in (8, 12, 18)]
+    for seed in range(4):
+        places = make_places(80, seed)
+        rng = np.random.default_rng(1000 + seed)
+        blog_counts = {p['name']: int(rng.choice([0, 51])) for p in places}
+        monkeypatch.setattr(engine, 'iter_blog_counts',
+                            lambda names, *a, **kw: ((i, blog_counts[n]) for i, n in enumerate(names)))
+        table = candidate_table(places)
+        engine.enrich_for_contexts(table, ctxs)
+        for ctx in ctxs:
+            _, expected = ranked_with(places, blog_counts, ctx)
+            assert_same_picks(rank_places(table, ctx)[1], expected)